@@ -1,4 +1,6 @@
 import glob
+import gzip
+import json
 import os
 from typing import Literal
 
@@ -8,14 +10,64 @@ from polars import Series, DataFrame
 from scipy import stats
 
 
+# Click log formats written by speedTest, see Model.export_click_log_*.
+# If a session was exported in several formats, the first one in this list is read.
+LOG_PATTERNS = ["*.parquet", "*.arrow", "*.ndjson.zst", "*.ndjson.gz", "*.ndjson", "*.csv"]
+
+
+def log_stem(filename: str) -> str:
+    """Name of a click log without its export extension, e.g. 'p1.run1' for 'p1.run1.ndjson.gz'."""
+    for pattern in sorted(LOG_PATTERNS, key=len, reverse=True):
+        extension = pattern[1:]
+        if filename.endswith(extension):
+            return filename[:-len(extension)]
+    return os.path.splitext(filename)[0]
+
+
+def read_click_log(file_path) -> DataFrame:
+    """
+    Read a single click log in any of the export formats.
+    Parquet and uncompressed Arrow files are memory-mapped instead of parsed.
+    """
+    if file_path.endswith(".parquet"):
+        return pl.read_parquet(file_path, memory_map=True)
+    if file_path.endswith(".arrow"):
+        return pl.read_ipc(file_path, memory_map=True)
+    if file_path.endswith(".ndjson.gz"):
+        with gzip.open(file_path, "rb") as file:
+            return pl.read_ndjson(file.read())
+    if file_path.endswith(".ndjson.zst"):
+        import pyarrow as pa
+        with pa.input_stream(file_path, compression="zstd") as stream:
+            return pl.read_ndjson(stream.read())
+    if file_path.endswith(".ndjson"):
+        return pl.read_ndjson(file_path)
+    return pl.read_csv(file_path)
+
+
+def read_session_meta(file_path) -> dict | None:
+    """
+    Read the <name>.meta.json written next to a click log (e.g. latency per device).
+    Returns None if there is none.
+    """
+    directory, filename = os.path.split(file_path)
+    meta_path = os.path.join(directory, log_stem(filename) + ".meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as file:
+        return json.load(file)
+
+
 def load_and_aggregate_logs(log_folder_path):
     aggregated_data = []
-    file_paths = glob.glob(os.path.join(log_folder_path, "*.csv"))
+    file_paths = {} # one file per session
+    for pattern in LOG_PATTERNS:
+        for file_path in sorted(glob.glob(os.path.join(log_folder_path, pattern))):
+            file_paths.setdefault(log_stem(os.path.basename(file_path)), file_path)
 
-    for file_path in file_paths:
+    for name_no_ext, file_path in file_paths.items():
         try:
             filename = os.path.basename(file_path)
-            name_no_ext = os.path.splitext(filename)[0]
             parts = name_no_ext.split('_')
 
             # Extract Subject ID and Condition
@@ -27,8 +79,7 @@ def load_and_aggregate_logs(log_folder_path):
             # Group A: 1-6 (NM -> M), Group B: 7-12 (M -> NM)
             group = "Group A (NM->M)" if subject_id <= 6 else "Group B (M->NM)"
 
-            # Read CSV
-            df = pl.read_csv(file_path)
+            df = read_click_log(file_path)
             success = df.filter(pl.col("shape_hit") == True).height
             error = df.filter(pl.col("shape_hit") == False).height
 
@@ -46,6 +97,25 @@ def load_and_aggregate_logs(log_folder_path):
 
     return pl.DataFrame(aggregated_data)
 
+def click_log_to_frame(click_log) -> DataFrame:
+    """
+    Build a DataFrame from a speedTest ClickLog without going through a file.
+    The numeric columns are wrapped with np.frombuffer, so they are not copied.
+    Clicks appended later and clearing the log for the next test do not change the frame.
+    """
+    cols = click_log.columns()
+    target_codes = np.frombuffer(cols["target_id"], dtype=np.int32)
+    target_ids = np.asarray(click_log.target_ids, dtype=object)
+
+    return pl.DataFrame({
+        "timestamp": np.frombuffer(cols["timestamp"], dtype=np.float64),
+        "event_ns": np.frombuffer(cols["event_ns"], dtype=np.int64),
+        "target_id": pl.Series(target_ids[target_codes], dtype=pl.Categorical),
+        "x": np.frombuffer(cols["x"], dtype=np.int32),
+        "y": np.frombuffer(cols["y"], dtype=np.int32),
+        "shape_hit": np.frombuffer(cols["shape_hit"], dtype=np.uint8).astype(bool),
+    })
+
 def cohens_d(s1: Series, s2: Series) -> float:
     """
     Compute Cohen\`s d for two independent samples using pooled standard deviation.
@@ -0,0 +1,349 @@
+"""
+Micro-benchmarks for the hot paths of the speed test, with scaling curves.
+
+Builds synthetic configs (10 - 10,000 shapes) and click logs (1e3 - 1e6 clicks),
+times every path and measures its peak memory with tracemalloc.
+Tk paths need a display, if there is none a virtual one is started with Xvfb
+(if installed), otherwise they are skipped.
+
+    python benchmarks/bench.py --output results.json
+    python benchmarks/bench.py --save-baseline            # before a study
+    python benchmarks/bench.py --compare                  # fails if slower than baseline
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from model.Model import Model
+from model.ConfigCompiler import ConfigCache
+from model.shapes import shape_classes
+from controller.Controller import Controller
+from controller.ContainsVisitor import ContainsVisitor
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+SHAPE_COUNTS = [10, 100, 1000, 10000]
+CLICK_COUNTS = [1_000, 10_000, 100_000, 1_000_000]
+CANVAS = (1920, 1080)
+
+
+# ================== Synthetic data ==================
+def make_config(n: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    shapes = []
+    for i in range(n):
+        shape_type = rng.choice(list(shape_classes))
+        shape = {"type": shape_type, "id": f"s{i}", "color": "gray",
+                 "x": rng.randrange(CANVAS[0] - 100), "y": rng.randrange(CANVAS[1] - 100)}
+        if shape_type in ("square", "triangle"):
+            shape["size"] = rng.randint(10, 100)
+        elif shape_type == "circle":
+            shape["radius"] = rng.randint(5, 50)
+        elif shape_type == "rectangle":
+            shape["width"] = rng.randint(10, 100)
+            shape["height"] = rng.randint(10, 100)
+        else:
+            shape["rx"] = rng.randint(5, 50)
+            shape["ry"] = rng.randint(5, 50)
+        shapes.append(shape)
+    return {"timer_duration": 60, "shapes": shapes}
+
+
+def make_model(tmp: Path, n: int) -> Model:
+    path = tmp / f"config_{n}.json"
+    if not path.exists():
+        path.write_text(json.dumps(make_config(n)))
+    model = Model()
+    model.config_cache = ConfigCache(tmp / "cache")
+    model.load_config(path)
+    return model
+
+
+def make_clicks(model: Model, clicks: int, seed: int = 0) -> list[tuple]:
+    rng = random.Random(seed)
+    return [(model.shapes[rng.randrange(len(model.shapes))], rng.random() < 0.9,
+             rng.randrange(CANVAS[0]), rng.randrange(CANVAS[1])) for _ in range(clicks)]
+
+
+def fill_click_log(model: Model, clicks: list[tuple]):
+    model.clear_log()
+    for shape, hit, x, y in clicks:
+        model.shape_active = shape
+        model.register_click(hit, x, y)
+
+
+# ================== Measurement ==================
+def measure(func, setup=None, repeat: int = 5, min_time: float = 0.05) -> dict:
+    """
+    Times func (after setup, which is not timed). Runs func in a loop until
+    min_time is reached, so very fast paths are measured too.
+    """
+    times = []
+    loops = 1
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        done = 0
+        while True:
+            func(state) if setup else func()
+            done += 1
+            elapsed = time.perf_counter() - start
+            if done >= loops and elapsed >= min_time or done >= loops * 1000:
+                break
+        loops = max(loops, done)
+        times.append(elapsed / done)
+
+    state = setup() if setup else None
+    tracemalloc.start()
+    func(state) if setup else func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"median_s": statistics.median(times), "min_s": min(times), "peak_bytes": peak}
+
+
+# ================== Benchmarks ==================
+def bench_model(tmp: Path, shape_counts: list[int]) -> dict:
+    results = {}
+    rng = random.Random(1)
+
+    for n in shape_counts:
+        model = make_model(tmp, n)
+        controller = Controller(model)
+        visitor = ContainsVisitor()
+        points = [(rng.randrange(CANVAS[0]), rng.randrange(CANVAS[1])) for _ in range(100)]
+
+        def contains_all():
+            for x, y in points[:10]:
+                visitor.set_position(x, y)
+                for shape in model.shapes:
+                    shape.accept(visitor)
+        results.setdefault("ContainsVisitor", {})[n] = measure(contains_all)
+
+        def check_hit():
+            for x, y in points:
+                controller.edit_state._check_shape_hit(x, y)
+        results.setdefault("EditState._check_shape_hit", {})[n] = measure(check_hit)
+
+        def move_and_snapshot():
+            shape = model.shapes[rng.randrange(n)]
+            shape.x += 1
+            model.shape_changed(shape)
+            model.snapshot()
+        results.setdefault("Model.snapshot", {})[n] = measure(move_and_snapshot)
+
+        def setup_undo():
+            move_and_snapshot()
+        results.setdefault("Model.undo", {})[n] = measure(lambda _: model.undo(), setup_undo, min_time=0)
+
+        path = tmp / f"config_{n}.json"
+        results.setdefault("Model.load_config (cold)", {})[n] = measure(
+            lambda m: m.load_config(path), lambda: _fresh_model(tmp), min_time=0)
+        results.setdefault("Model.load_config (cached)", {})[n] = measure(lambda: model.load_config(path))
+
+        specs = [(values.pop("type"), values) for values in make_config(n)["shapes"]]
+        results.setdefault("Model.add_shapes", {})[n] = measure(
+            lambda m: m.add_shapes(specs), Model, min_time=0)
+
+    return results
+
+
+def _fresh_model(tmp: Path) -> Model:
+    cache_dir = tmp / "cache_cold"
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    model = Model()
+    model.config_cache = ConfigCache(cache_dir)
+    return model
+
+
+def bench_export(tmp: Path, click_counts: list[int]) -> dict:
+    results = {}
+    model = make_model(tmp, 100)
+    for count in click_counts:
+        clicks = make_clicks(model, count)
+        results.setdefault("Model.register_click", {})[count] = measure(
+            lambda: fill_click_log(model, clicks), repeat=3, min_time=0)
+        del clicks # the log itself is measured below, not the input list
+        results.setdefault("Model.export_click_log_json", {})[count] = measure(
+            lambda: model.export_click_log_json(tmp / "clicks.json"), repeat=3, min_time=0)
+        results.setdefault("Model.export_click_log_csv", {})[count] = measure(
+            lambda: model.export_click_log_csv(tmp / "clicks.csv"), repeat=3, min_time=0)
+    return results
+
+
+def bench_tk(tmp: Path, shape_counts: list[int]) -> dict:
+    import tkinter as tk
+    from model.ConfigLibrary import ConfigLibrary
+    from view.DrawVisitor import DrawVisitor
+    from view.View import View
+
+    results = {}
+    root = tk.Tk()
+    root.geometry(f"{CANVAS[0]}x{CANVAS[1]}")
+    try:
+        for n in shape_counts:
+            model = make_model(tmp, n)
+            window = tk.Toplevel(root)
+            canvas = tk.Canvas(window)
+            canvas.pack(fill="both", expand=True)
+
+            def draw(visitor):
+                visitor.active = model.shape_active
+                visitor.begin()
+                for shape in model.shapes:
+                    shape.accept(visitor)
+                visitor.end()
+                canvas.update_idletasks()
+
+            # first draw creates every item
+            results.setdefault("DrawVisitor (first draw)", {})[n] = measure(
+                draw, lambda: _new_draw_visitor(canvas, DrawVisitor), min_time=0)
+            window.destroy()
+
+            # the real view, without a scheduler the model hands every change to it at once
+            model.config_library = ConfigLibrary(tmp / "configs", tmp / "config_index.json")
+            window = tk.Toplevel(root)
+            view = View(window, model, Controller(model))
+            view.controller.view = view
+            window.update_idletasks()
+
+            def update_unchanged():
+                view.update()
+                window.update_idletasks()
+            results.setdefault("View.update (no change)", {})[n] = measure(update_unchanged)
+
+            def next_target():
+                model.next_shape() # delivers ACTIVE_CHANGED to view.update(changes)
+                window.update_idletasks()
+            results.setdefault("View.update (next target)", {})[n] = measure(next_target)
+
+            view.device_discovery.stop()
+            model.shutdown()
+            window.destroy()
+    finally:
+        root.destroy()
+    return results
+
+
+def _new_draw_visitor(canvas, cls):
+    canvas.delete("all")
+    return cls(canvas)
+
+
+# ================== Virtual display ==================
+def start_virtual_display():
+    """Starts Xvfb if there is no display. Returns the process or None."""
+    if os.environ.get("DISPLAY") or sys.platform != "linux":
+        return None
+    if shutil.which("Xvfb") is None:
+        return None
+    display = ":99"
+    proc = subprocess.Popen(["Xvfb", display, "-screen", "0", f"{CANVAS[0]}x{CANVAS[1]}x24"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    os.environ["DISPLAY"] = display
+    return proc
+
+
+def has_display() -> bool:
+    try:
+        import tkinter as tk
+        tk.Tk().destroy()
+        return True
+    except Exception:
+        return False
+
+
+# ================== Baseline ==================
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Returns a message for every path that is slower than threshold * baseline."""
+    regressions = []
+    for name, sizes in results["results"].items():
+        for size, result in sizes.items():
+            base = baseline.get("results", {}).get(name, {}).get(str(size))
+            if not base:
+                continue
+            ratio = result["median_s"] / base["median_s"] if base["median_s"] else 1.0
+            if ratio > threshold:
+                regressions.append(f"{name} [{size}]: {ratio:.2f}x slower than baseline "
+                                   f"({result['median_s'] * 1e3:.3f} ms vs {base['median_s'] * 1e3:.3f} ms)")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the speed test hot paths.")
+    parser.add_argument("--quick", action="store_true", help="only the two smallest sizes")
+    parser.add_argument("--no-tk", action="store_true", help="skip paths that need a display")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--save-baseline", action="store_true", help=f"store results in {BASELINE_PATH.name}")
+    parser.add_argument("--compare", action="store_true", help="compare with the stored baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="allowed slowdown factor")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+    shape_counts = SHAPE_COUNTS[:2] if args.quick else SHAPE_COUNTS
+    click_counts = CLICK_COUNTS[:2] if args.quick else CLICK_COUNTS
+
+    results = {}
+    xvfb = None
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        results.update(bench_model(tmp, shape_counts))
+        results.update(bench_export(tmp, click_counts))
+        if not args.no_tk:
+            xvfb = start_virtual_display()
+            try:
+                if has_display():
+                    results.update(bench_tk(tmp, shape_counts))
+                else:
+                    print("No display available, skipping Tk benchmarks.", file=sys.stderr)
+            finally:
+                if xvfb:
+                    xvfb.terminate()
+
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": {name: {str(size): r for size, r in sizes.items()} for name, sizes in results.items()},
+    }
+
+    for name, sizes in report["results"].items():
+        print(name)
+        for size, r in sizes.items():
+            print(f"  {size:>8}: {r['median_s'] * 1e3:10.3f} ms   peak {r['peak_bytes'] / 1024:10.1f} KiB")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=4))
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps(report, indent=4))
+        print(f"Baseline saved to {BASELINE_PATH}")
+    if args.compare:
+        if not BASELINE_PATH.exists():
+            print("No baseline stored, run with --save-baseline first.", file=sys.stderr)
+            return 1
+        regressions = compare(report, json.loads(BASELINE_PATH.read_text()), args.threshold)
+        for message in regressions:
+            print("REGRESSION " + message, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
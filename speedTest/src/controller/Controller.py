@@ -2,7 +2,6 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 import logging as log
-import tkinter as tk
 
 from controller.ContainsVisitor import ContainsVisitor
 from controller.state.IdleState import IdleState
@@ -11,9 +10,10 @@ from controller.state.EditState import EditState
 
 if TYPE_CHECKING:
     from pathlib import Path
-    from view.View import View
+    from view.ViewInterface import ViewInterface
     from model.Model import Model
     from controller.InputController import InputController
+    from controller.Scheduler import Scheduler
 
 
 class Controller:
@@ -22,15 +22,19 @@ class Controller:
     Most logic is inside the state classes, shared logic between states is here.
     """
 
+    CONFIG_LOAD_POLL_MS = 30
+
     def __init__(self, model: Model):
         self.model = model
         self._timer_job = None
+        self._config_load_job = None
         self.time_remaining = 0
         self.contains_visitor = ContainsVisitor()
 
         # late inits in main.py
-        self.view: View = None 
+        self.view: ViewInterface = None 
         self.input_controller: InputController = None 
+        self.scheduler: Scheduler = None # timers, TkScheduler or VirtualScheduler
 
         # States, so they dont need to be newly created every time
         self.idle_state = IdleState(self)
@@ -42,18 +46,50 @@ class Controller:
 
     # ================== Configuration / Export ==================
     def _load_config(self, config_path: Path):
-        """Load configuration from file and disable export button."""
-        self.model.load_config(config_path)
+        """Loads a configuration in a worker thread, a load that is still running is cancelled."""
+        if self.model.start_config_load(config_path) is not None and self._config_load_job is None:
+            self._config_load_job = self.scheduler.after(self.CONFIG_LOAD_POLL_MS, self._poll_config_load)
+
+    def _poll_config_load(self):
+        """Shows the progress of a config load and applies it once the worker is done."""
+        loader = self.model.config_loader
+        load = loader.take_finished()
+        if load is not None or not loader.busy():
+            self._config_load_job = None
+            self.view.show_load_progress(None)
+            if load is not None:
+                self.model.finish_config_load(load)
+            return
+        self.view.show_load_progress(loader.current.progress)
+        self._config_load_job = self.scheduler.after(self.CONFIG_LOAD_POLL_MS, self._poll_config_load)
 
     def _export_config(self, filepath: Path):
         self.model.export_config(filepath)
 
-    def _export_log(self, filepath: Path, type: str):
-        """Export click log to a JSON file."""
-        if type == "json":
-            self.model.export_click_log_json(filepath)
-        elif type == "csv":
-            self.model.export_click_log_csv(filepath)
-        else:
-            log.warning(f"unkown export type: {type}, defaulting to JSON.")
-            self.model.export_click_log_json(filepath)
\ No newline at end of file
+    def _set_log_streaming(self, enabled: bool):
+        self.model.set_log_streaming(enabled)
+
+    def _set_latency_tracing(self, enabled: bool):
+        self.model.set_latency_tracing(enabled)
+
+    def _set_target_order(self, order: str):
+        self.model.set_target_order(order)
+
+    def _export_log(self, filepath: Path, type: str, compression: str = None):
+        """Export click log to a file of the given type."""
+        try:
+            if type == "json":
+                self.model.export_click_log_json(filepath)
+            elif type == "csv":
+                self.model.export_click_log_csv(filepath)
+            elif type == "parquet":
+                self.model.export_click_log_parquet(filepath, compression)
+            elif type == "arrow":
+                self.model.export_click_log_arrow(filepath, compression)
+            elif type == "ndjson":
+                self.model.export_click_log_ndjson(filepath, compression)
+            else:
+                log.warning(f"unkown export type: {type}, defaulting to JSON.")
+                self.model.export_click_log_json(filepath)
+        except ImportError as e:
+            log.error(f"Cannot export click log as {type}, missing package: {e.name}")
\ No newline at end of file
@@ -3,14 +3,8 @@ from typing import TYPE_CHECKING
 
 import logging as log
 
-from controller.input_devices.MouseInput import MouseInput
-from controller.input_devices.GamepadInput import GamepadInput
-
-try:
-    GESTURE_AVAILABLE = True
-    from controller.input_devices.GestureInput import GestureInput
-except:
-    GESTURE_AVAILABLE = False
+from controller.InputEventQueue import InputEventQueue
+from controller.input_devices.DeviceRegistry import registry
 
 if TYPE_CHECKING:
     from view.View import View
@@ -20,52 +14,141 @@ class InputController:
     """
     Main interface for input devices. Handles all logic regarding inputs.
     Expects normalized coordinates (0..1) and converts them to absolute pixel values
-    before forwarding to CanvasCursor and AppController.
+    before forwarding to CanvasCursor and AppController. Devices that already have
+    pixel coordinates (mouse) use the *_pixels methods. The canvas size is cached
+    and refreshed on <Configure>, so handling an event needs no Tk call.
+    t_ns is the time.perf_counter_ns() timestamp of the event, taken by the device.
+
+    The methods touch Tk and the model, so they must run in the main loop. Devices
+    with their own threads post to self.events instead, which is drained every
+    PUMP_MS by start_event_pump().
     """
+    PUMP_MS = 8
 
     def __init__(self, controller:Controller, view: View):
         self.cursor = view.cursor
         self.canvas = view.canvas # for mouse input
         self.controller = controller
+        self.canvas_width = max(self.canvas.winfo_width(), 1)
+        self.canvas_height = max(self.canvas.winfo_height(), 1)
+        self.canvas.bind("<Configure>", self._on_canvas_configure, add="+")
+        self.events = InputEventQueue() # events from device threads
+        self._pump_job = None
 
         # Default input device
-        self.input_device = MouseInput(view.canvas, self)
+        self.input_device = registry.create("Mouse", self)
         self.input_device.activate()
 
 
+    def start_event_pump(self):
+        """Starts handling events posted by device threads. Needs controller.scheduler."""
+        if self._pump_job is None:
+            self._pump_job = self.controller.scheduler.after(self.PUMP_MS, self._pump)
+
+
+    def stop_event_pump(self):
+        if self._pump_job is not None:
+            self.controller.scheduler.after_cancel(self._pump_job)
+            self._pump_job = None
+
+
+    def _pump(self):
+        """Handles the queued events. A failing event is logged, the others and the pump go on."""
+        try:
+            for kind, x, y, t_ns in self.events.drain():
+                try:
+                    getattr(self, kind)(x, y, t_ns)
+                except Exception:
+                    log.exception(f"Handling {kind} at ({x:.3f}, {y:.3f}) failed.")
+        finally:
+            self._pump_job = self.controller.scheduler.after(self.PUMP_MS, self._pump)
+
+
+    @property
+    def tracer(self):
+        return self.controller.model.latency_tracer
+
+
+    def _trace(self, kind: str, t_ns: int):
+        """Starts a latency trace for an event, if tracing is enabled."""
+        tracer = self.tracer
+        if tracer is None:
+            return None
+        return tracer.start(self.input_device.get_name(), kind, t_ns)
+
+
+    def _finish_trace(self, trace, stage: str):
+        """Stamps the last synchronous stage, the frame is done once Tk is idle again."""
+        trace.tracer.stage(trace, stage)
+        # The model hands its changes to the view in an idle callback queued above, and Tk redraws the
+        # canvas in an idle callback queued by that. Idle callbacks queued while idle run in the next
+        # round, so the trace is finished one round later, after the redraw.
+        scheduler = self.controller.scheduler
+        scheduler.after_idle(lambda: scheduler.after_idle(lambda: trace.tracer.finish(trace)))
+
+
+    def _on_canvas_configure(self, event):
+        self.canvas_width = max(event.width, 1)
+        self.canvas_height = max(event.height, 1)
+
+
     def _to_pixels(self, x: float, y: float):
         """Convert normalized coordinates (0..1) to pixel coordinates."""
-        canvas_width = self.cursor.canvas.winfo_width()
-        canvas_height = self.cursor.canvas.winfo_height()
-        px = int(x * canvas_width)
-        py = int(y * canvas_height)
-        return px, py
-    
-
-    def move_to(self, x: float, y: float):
+        return int(x * self.canvas_width), int(y * self.canvas_height)
+
+
+    # ================== Normalized coordinates ==================
+    def move_to(self, x: float, y: float, t_ns: int = None):
         """Move cursor to position given in normalized coordinates."""
-        px, py = self._to_pixels(x, y)
+        self.move_to_pixels(*self._to_pixels(x, y), t_ns)
+
+
+    def left_click(self, x: float, y: float, t_ns: int = None):
+        """Register left click at normalized coordinates."""
+        self.left_click_pixels(*self._to_pixels(x, y), t_ns)
+
+
+    def left_release(self, x: float, y: float, t_ns: int = None):
+        """Register left release at normalized coordinates."""
+        self.left_release_pixels(*self._to_pixels(x, y), t_ns)
+
+
+    def right_click(self, x: float, y: float, t_ns: int = None):
+        """Register right click at normalized coordinates."""
+        self.right_click_pixels(*self._to_pixels(x, y), t_ns)
+
+
+    # ================== Pixel coordinates ==================
+    def move_to_pixels(self, px: int, py: int, t_ns: int = None):
+        """Move cursor to position given in canvas pixels."""
+        trace = self._trace("move", t_ns)
         self.cursor.move_to(px, py)
+        if trace:
+            trace.tracer.stage(trace, "cursor")
         self.controller.state.canvas_motion(px, py)
+        if trace:
+            self._finish_trace(trace, "state")
 
 
-    def left_click(self, x: float, y: float):
-        """Register left click at normalized coordinates."""
-        px, py = self._to_pixels(x, y)
-        self.controller.state.canvas_left_click(px, py)
+    def left_click_pixels(self, px: int, py: int, t_ns: int = None):
+        """Register left click at canvas pixels."""
+        trace = self._trace("click", t_ns)
+        self.controller.state.canvas_left_click(px, py, t_ns)
+        if trace:
+            trace.tracer.stage(trace, "state")
         self.cursor.left_click()
+        if trace:
+            self._finish_trace(trace, "cursor")
 
 
-    def left_release(self, x: float, y: float):
-        """Register left release at normalized coordinates."""
-        px, py = self._to_pixels(x, y)
+    def left_release_pixels(self, px: int, py: int, t_ns: int = None):
+        """Register left release at canvas pixels."""
         self.controller.state.canvas_left_release(px, py)
         self.cursor.left_release()
 
 
-    def right_click(self, x: float, y: float):
-        """Register right click at normalized coordinates."""
-        px, py = self._to_pixels(x, y)
+    def right_click_pixels(self, px: int, py: int, t_ns: int = None):
+        """Register right click at canvas pixels."""
         self.controller.state.canvas_right_click(px, py)
 
 
@@ -75,20 +158,17 @@ class InputController:
         # Deactivate existing device
         if self.input_device:
             self.input_device.deactivate()
+        self.events.clear() # nothing of the old device should arrive after the switch
 
-        # Setting new device
-        if device_name == "Mouse":
-            self.input_device = MouseInput(self.canvas, self)
-        elif device_name == "Hand Tracking":
-            if GESTURE_AVAILABLE:
-                self.input_device = GestureInput(self)
-            else:
-                log.error("Error loading GesureInput.")
-        elif device_name == "Gamepad":
-            aspect_ratio = self.canvas.winfo_width() / self.canvas.winfo_height()
-            self.input_device = GamepadInput(self, aspect_ratio)
-        else:
+        # Setting new device, its backend is imported on first use
+        if device_name not in registry.names():
             raise ValueError(f"Unknown input device: {device_name}")
+        try:
+            self.input_device = registry.create(device_name, self)
+        except Exception as e: # missing or broken package, e.g. mediapipe
+            log.error(f"Cannot load input device {device_name}, using Mouse: {e}")
+            self.input_device = registry.create("Mouse", self)
+            self.controller.view.show_input_device("Mouse")
 
         # Activate new device
         self.input_device.activate()
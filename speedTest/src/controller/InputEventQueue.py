@@ -0,0 +1,56 @@
+from collections import deque
+
+
+class InputEventQueue:
+    """
+    Hands events from input device threads to the Tk main loop.
+    Devices call move_to / left_click / ... from any thread, same signature as
+    InputController. The main loop takes them out with drain().
+
+    deque.append and popleft are atomic, so no lock is needed. Moves are only
+    positions, so consecutive moves are merged to the latest one when draining
+    and dropped if the queue is full. Clicks and releases are always kept.
+    """
+
+    def __init__(self, max_events: int = 1024):
+        self.max_events = max_events
+        self.dropped_moves = 0
+        self._events = deque() # (kind, x, y, t_ns)
+
+    # ================== Device threads ==================
+    def move_to(self, x: float, y: float, t_ns: int = None):
+        if len(self._events) >= self.max_events:
+            self.dropped_moves += 1
+            return
+        self._events.append(("move_to", x, y, t_ns))
+
+    def left_click(self, x: float, y: float, t_ns: int = None):
+        self._events.append(("left_click", x, y, t_ns))
+
+    def left_release(self, x: float, y: float, t_ns: int = None):
+        self._events.append(("left_release", x, y, t_ns))
+
+    def right_click(self, x: float, y: float, t_ns: int = None):
+        self._events.append(("right_click", x, y, t_ns))
+
+    # ================== Main loop ==================
+    def drain(self) -> list[tuple]:
+        """
+        Takes all queued events in order. A move is skipped if the next event is
+        a move too, so the position before every click and the last one survive.
+        """
+        events = []
+        popleft = self._events.popleft
+        for _ in range(len(self._events)):
+            event = popleft()
+            if events and event[0] == "move_to" and events[-1][0] == "move_to":
+                events[-1] = event
+            else:
+                events.append(event)
+        return events
+
+    def clear(self):
+        self._events.clear()
+
+    def __len__(self):
+        return len(self._events)
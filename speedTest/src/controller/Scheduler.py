@@ -0,0 +1,96 @@
+import heapq
+import time
+import itertools
+
+
+class Scheduler:
+    """
+    Timers and the clock used by the states, so they do not depend on Tk.
+    TkScheduler is used by the app, VirtualScheduler runs tests without a display.
+    """
+
+    def after(self, ms: int, callback):
+        """Call callback in ms milliseconds. Returns a job for after_cancel()."""
+        raise NotImplementedError
+
+    def after_cancel(self, job):
+        raise NotImplementedError
+
+    def after_idle(self, callback):
+        """Call callback once all pending events are handled."""
+        raise NotImplementedError
+
+    def monotonic_ns(self) -> int:
+        """Clock for measuring time, same clock as the input event timestamps."""
+        return time.perf_counter_ns()
+
+
+class TkScheduler(Scheduler):
+    def __init__(self, root):
+        self.root = root
+
+    def after(self, ms: int, callback):
+        return self.root.after(ms, callback)
+
+    def after_cancel(self, job):
+        self.root.after_cancel(job)
+
+    def after_idle(self, callback):
+        return self.root.after_idle(callback)
+
+
+class VirtualScheduler(Scheduler):
+    """
+    Scheduler with a virtual clock. Time only advances when the next job runs,
+    so a 60 s test runs as fast as the callbacks allow.
+    """
+
+    def __init__(self):
+        self._now_ns = 0
+        self._jobs = [] # heap of (due_ns, seq, callback)
+        self._seq = itertools.count()
+        self._live = set() # jobs not run yet
+        self._cancelled = set()
+
+    def monotonic_ns(self) -> int:
+        return self._now_ns
+
+    def after(self, ms: int, callback):
+        job = next(self._seq)
+        heapq.heappush(self._jobs, (self._now_ns + int(ms * 1_000_000), job, callback))
+        self._live.add(job)
+        return job
+
+    def after_cancel(self, job):
+        if job in self._live:
+            self._live.discard(job)
+            self._cancelled.add(job)
+
+    def after_idle(self, callback):
+        return self.after(0, callback)
+
+    def pending(self) -> bool:
+        return bool(self._live)
+
+    def run_next(self) -> bool:
+        """Advances the clock to the next job and runs it. Returns False if there is none."""
+        while self._jobs:
+            due_ns, job, callback = heapq.heappop(self._jobs)
+            if job in self._cancelled:
+                self._cancelled.discard(job)
+                continue
+            self._live.discard(job)
+            self._now_ns = max(self._now_ns, due_ns)
+            callback()
+            return True
+        return False
+
+    def run(self, until=None):
+        """Runs jobs until none are left or until() returns True."""
+        while (until is None or not until()) and self.run_next():
+            pass
+
+    def clear(self):
+        self._jobs.clear()
+        self._live.clear()
+        self._cancelled.clear()
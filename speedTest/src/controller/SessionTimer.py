@@ -0,0 +1,102 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import math
+import time
+
+from model.LatencyTracer import LatencyHistogram
+
+if TYPE_CHECKING:
+    from controller.Scheduler import Scheduler
+
+NS_PER_S = 1_000_000_000
+
+
+class SessionTimer:
+    """
+    Countdown of a test against a fixed deadline on the monotonic clock of the
+    scheduler (the same clock the input events are stamped with).
+    Every tick is scheduled for the next full second before the deadline,
+    measured from the deadline, so late ticks do not add up and the test ends
+    at the deadline and not after duration * (1 s + tick latency).
+
+    on_tick(seconds_left) updates the display, on_expired() ends the test.
+    How late each tick woke up is collected in tick_jitter.
+    """
+
+    def __init__(self, scheduler: Scheduler, duration_s: float, on_tick, on_expired):
+        self.scheduler = scheduler
+        self.duration_s = duration_s
+        self.on_tick = on_tick
+        self.on_expired = on_expired
+
+        self.start_ns: int = None
+        self.deadline_ns: int = None
+        self.end_ns: int = None # when the test was actually ended
+        self.start_time: float = None # wall clock, for the log
+        self.end_time: float = None
+        self.tick_jitter = LatencyHistogram()
+        self.rejected_clicks = 0 # clicks stamped after the deadline
+
+        self._job = None
+        self._due_ns: int = None # when the pending tick should run
+
+    def start(self):
+        self.start_ns = self.scheduler.monotonic_ns()
+        self.start_time = time.time()
+        self.deadline_ns = self.start_ns + round(self.duration_s * NS_PER_S)
+        self._tick()
+
+    def stop(self):
+        """Cancels the pending tick and stamps the end of the test."""
+        if self._job is not None:
+            self.scheduler.after_cancel(self._job)
+            self._job = None
+        if self.start_ns is not None and self.end_ns is None:
+            self.end_ns = self.scheduler.monotonic_ns()
+            self.end_time = time.time()
+
+    def remaining_ns(self, now_ns: int = None) -> int:
+        if now_ns is None:
+            now_ns = self.scheduler.monotonic_ns()
+        return self.deadline_ns - now_ns
+
+    def expired(self, t_ns: int = None) -> bool:
+        """True if t_ns (default: now) is at or after the deadline."""
+        return self.deadline_ns is not None and self.remaining_ns(t_ns) <= 0
+
+    def _tick(self):
+        self._job = None
+        now = self.scheduler.monotonic_ns()
+        if self._due_ns is not None and now >= self._due_ns:
+            self.tick_jitter.add(now - self._due_ns)
+
+        remaining = self.deadline_ns - now
+        if remaining <= 0:
+            self.on_expired()
+            return
+
+        seconds_left = math.ceil(remaining / NS_PER_S)
+        if now >= (self._due_ns or 0):
+            self.on_tick(seconds_left)
+        # next full second before the deadline, or the deadline itself.
+        # If a timer fires early, the same tick is scheduled again.
+        self._due_ns = self.deadline_ns - (seconds_left - 1) * NS_PER_S
+        delay_ms = max(math.ceil((self._due_ns - now) / 1_000_000), 1)
+        self._job = self.scheduler.after(delay_ms, self._tick)
+
+    def to_dict(self) -> dict:
+        """Stored in the session meta data."""
+        ended = self.end_ns is not None
+        return {
+            "duration_s": self.duration_s,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "start_ns": self.start_ns,
+            "deadline_ns": self.deadline_ns,
+            "end_ns": self.end_ns,
+            "actual_s": (self.end_ns - self.start_ns) / NS_PER_S if ended else None,
+            "overrun_ms": round((self.end_ns - self.deadline_ns) / 1e6, 3) if ended else None, # negative if stopped early
+            "rejected_clicks": self.rejected_clicks,
+            "tick_jitter": self.tick_jitter.summary(),
+        }
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+import logging as log
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+# may be None to keep the camera default
+OPTIONAL = {"width", "height", "fps", "buffer_size", "inference_width"}
+
+
+@dataclass
+class CaptureProfile:
+    """
+    Camera settings for hand tracking. None keeps the camera default.
+    Read from HAND_TRACKING_PROFILE (see paths.py) every time Hand Tracking is
+    selected, so a changed file is used after switching the device again.
+    """
+    camera: int = 0
+    width: int = 640
+    height: int = 480
+    fps: int = 30
+    buffer_size: int = 1            # frames buffered by the driver, more means older frames
+    inference_width: int = 320      # frames are scaled down to this width before inference, None = full size
+    model_complexity: int = 1       # MediaPipe hand model, 0 is faster on CPU, 1 more accurate
+    show_debug: bool = False        # camera window with the frames used for tracking
+
+    @classmethod
+    def from_dict(cls, values: dict) -> CaptureProfile:
+        """Unknown keys and values of the wrong type are logged and the default is kept."""
+        defaults = {f.name: f.default for f in fields(cls)}
+        kwargs = {}
+        for key, value in values.items():
+            if key not in defaults:
+                log.warning(f"Capture profile: unknown key {key!r} ignored")
+                continue
+            if isinstance(defaults[key], bool):
+                valid = isinstance(value, bool)
+            else:
+                valid = (isinstance(value, int) and not isinstance(value, bool) and value >= 0
+                         or value is None and key in OPTIONAL)
+                if key == "model_complexity":
+                    valid = valid and value in (0, 1)
+            if not valid:
+                log.warning(f"Capture profile: invalid value {value!r} for {key!r}, using {defaults[key]!r}")
+                continue
+            kwargs[key] = value
+        return cls(**kwargs)
+
+    @classmethod
+    def load(cls, path: Path) -> CaptureProfile:
+        """Reads a profile from a JSON object, the defaults if the file does not exist or is broken."""
+        try:
+            values = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return cls()
+        except (OSError, ValueError) as e:
+            log.warning(f"Cannot read capture profile {path}, using defaults: {e}")
+            return cls()
+        if not isinstance(values, dict):
+            log.warning(f"Capture profile {path} must be a JSON object, using defaults")
+            return cls()
+        profile = cls.from_dict(values)
+        log.info(f"Capture profile loaded from {path}: {profile}")
+        return profile
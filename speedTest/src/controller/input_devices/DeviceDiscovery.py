@@ -0,0 +1,81 @@
+import threading
+import time
+import logging as log
+from pathlib import Path
+
+from controller.input_devices.DeviceRegistry import DeviceRegistry, DEV_DIR
+
+
+class DeviceDiscovery:
+    """
+    Checks in a background thread which input devices are connected, so plugging
+    in a gamepad shows up without a restart and the UI never waits for the
+    enumeration. The main loop calls poll() to get changes.
+    Detections with a detect_interval (e.g. enumerating gamepads on Windows) are
+    only run again after that interval, or at the next check after refresh().
+    dev_dir can be a fake directory (input/by-id/*-event-joystick, video*) for testing.
+    """
+
+    def __init__(self, registry: DeviceRegistry, interval: float = 1.0, dev_dir: Path = DEV_DIR):
+        self.registry = registry
+        self.interval = interval # seconds between checks
+        self.dev_dir = dev_dir
+
+        self._available: tuple[str, ...] = None # replaced as a whole by the thread
+        self._reported: tuple[str, ...] = None
+        self._detected: dict[str, tuple[float, bool]] = {} # name -> (monotonic time, available), thread only
+        self._refresh = False
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="DeviceDiscovery", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=1)
+        self._thread = None
+
+    def refresh(self):
+        """Checks every device at once, e.g. when the dropdown is opened."""
+        self._refresh = True
+        self._wake.set()
+
+    def scan(self, force: bool = True) -> tuple[str, ...]:
+        """Names of all available devices, in registry order. Without force, recent results are reused."""
+        now = time.monotonic()
+        available = []
+        for name in self.registry.names():
+            known = self._detected.get(name)
+            if force or known is None or now - known[0] >= self.registry.detect_interval(name):
+                known = self._detected[name] = (now, self.registry.is_available(name, self.dev_dir))
+            if known[1]:
+                available.append(name)
+        return tuple(available)
+
+    def poll(self) -> list[str] | None:
+        """Returns the available devices if they changed since the last poll, else None."""
+        available = self._available
+        if available is None or available == self._reported:
+            return None
+        self._reported = available
+        return list(available)
+
+    def _run(self):
+        while not self._stop.is_set():
+            force, self._refresh = self._refresh, False
+            available = self.scan(force)
+            if available != self._available:
+                if self._available is not None:
+                    log.info(f"Input devices changed: {', '.join(available)}")
+                self._available = available
+            self._wake.wait(self.interval)
+            self._wake.clear()
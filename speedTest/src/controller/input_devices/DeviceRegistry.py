@@ -0,0 +1,125 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable
+
+import glob
+import importlib
+import sys
+import time
+import logging as log
+from dataclasses import dataclass
+from pathlib import Path
+
+from paths import HAND_TRACKING_PROFILE
+from controller.input_devices.CaptureProfile import CaptureProfile
+
+DEV_DIR = Path("/dev")
+
+if TYPE_CHECKING:
+    from controller.InputController import InputController
+    from controller.input_devices.InputDevice import InputDevice
+
+
+@dataclass
+class DeviceEntry:
+    name: str
+    module: str
+    class_name: str
+    factory: Callable # (cls, input_controller) -> InputDevice
+    detect: Callable[[Path], bool] = None # (dev_dir) -> connected?, None = always available
+    detect_interval: float = 0 # seconds a detection result is reused, for detections that enumerate devices
+
+
+class DeviceRegistry:
+    """
+    Input devices by the name shown in the dropdown. The module of a device
+    (cv2 and mediapipe for hand tracking, inputs for the gamepad) is only
+    imported when the device is created the first time, so startup stays fast.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, DeviceEntry] = {}
+        self._classes: dict[str, type] = {}
+
+    def register(self, name: str, module: str, class_name: str, factory: Callable,
+                 detect: Callable[[Path], bool] = None, detect_interval: float = 0):
+        self._entries[name] = DeviceEntry(name, module, class_name, factory, detect, detect_interval)
+
+    def names(self) -> list[str]:
+        return list(self._entries)
+
+    def always_available(self) -> list[str]:
+        """Devices without a detection, e.g. the mouse."""
+        return [name for name, entry in self._entries.items() if entry.detect is None]
+
+    def detect_interval(self, name: str) -> float:
+        return self._entries[name].detect_interval
+
+    def is_available(self, name: str, dev_dir: Path = DEV_DIR) -> bool:
+        """
+        Runs the detection of a device, e.g. if a gamepad is plugged in. Can be slow,
+        DeviceDiscovery runs it in a thread. dev_dir can be replaced by a fake directory.
+        """
+        detect = self._entries[name].detect
+        if detect is None:
+            return True
+        try:
+            return detect(dev_dir)
+        except Exception as e:
+            log.debug(f"Detecting {name} failed: {e}")
+            return False
+
+    def load(self, name: str) -> type:
+        """Imports the backend of a device. Raises ImportError if a package is missing."""
+        cls = self._classes.get(name)
+        if cls is None:
+            entry = self._entries[name]
+            start = time.perf_counter()
+            module = importlib.import_module(entry.module)
+            cls = self._classes[name] = getattr(module, entry.class_name)
+            log.info(f"Input backend '{name}' loaded in {(time.perf_counter() - start) * 1e3:.0f} ms")
+        return cls
+
+    def create(self, name: str, input_controller: InputController) -> InputDevice:
+        if name not in self._entries:
+            raise ValueError(f"Unknown input device: {name}")
+        return self._entries[name].factory(self.load(name), input_controller)
+
+
+# inputs enumerates every input device of the system, so elsewhere than Linux this is not done every second
+GAMEPAD_DETECT_INTERVAL = 0 if sys.platform.startswith("linux") else 10.0
+
+
+def gamepad_paths(dev_dir: Path = DEV_DIR) -> list[str]:
+    """evdev devices of the connected gamepads (Linux). udev links every gamepad in /dev/input/by-id."""
+    return sorted(glob.glob(str(dev_dir / "input" / "by-id" / "*-event-joystick")))
+
+
+def gamepad_connected(dev_dir: Path = DEV_DIR) -> bool:
+    """
+    On Linux no need to import inputs, elsewhere it enumerates again (inputs.devices is only made on
+    import). That is slow, DeviceDiscovery runs it every GAMEPAD_DETECT_INTERVAL or when asked to refresh.
+    """
+    if sys.platform.startswith("linux"):
+        return bool(gamepad_paths(dev_dir))
+    import inputs
+    # Only counted here. inputs.devices is replaced by GamepadInput in the main thread when the
+    # gamepad is selected, not from this thread while a reader may be inside get_gamepad().
+    return bool(inputs.DeviceManager().gamepads)
+
+
+def camera_connected(dev_dir: Path = DEV_DIR) -> bool:
+    """Only checked on Linux, elsewhere opening a camera to find out takes seconds."""
+    if sys.platform.startswith("linux"):
+        return bool(glob.glob(str(dev_dir / "video*")))
+    return True
+
+
+registry = DeviceRegistry()
+registry.register("Mouse", "controller.input_devices.MouseInput", "MouseInput",
+                  lambda cls, ic: cls(ic.canvas, ic))
+registry.register("Hand Tracking", "controller.input_devices.GestureInput", "GestureInput",
+                  lambda cls, ic: cls(ic, CaptureProfile.load(HAND_TRACKING_PROFILE)),
+                  detect=camera_connected)
+registry.register("Gamepad", "controller.input_devices.GamepadInput", "GamepadInput",
+                  lambda cls, ic: cls(ic, ic.canvas_width / ic.canvas_height),
+                  detect=gamepad_connected, detect_interval=GAMEPAD_DETECT_INTERVAL)
@@ -0,0 +1,140 @@
+import errno
+import os
+import selectors
+import struct
+import threading
+import logging as log
+
+# struct input_event of linux/input.h: timeval (sec, usec), type, code, value
+EVENT_FORMAT = "llHHi"
+EVENT_SIZE = struct.calcsize(EVENT_FORMAT)
+
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_ABS = 0x03
+
+# event codes used by GamepadInput, same names as the inputs package uses
+CODE_NAMES = {
+    (EV_ABS, 0x00): "ABS_X",
+    (EV_ABS, 0x01): "ABS_Y",
+    (EV_KEY, 0x130): "BTN_SOUTH",
+    (EV_KEY, 0x131): "BTN_EAST",
+    (EV_KEY, 0x133): "BTN_NORTH",
+    (EV_KEY, 0x134): "BTN_WEST",
+}
+
+
+def abs_range(fd: int, code: int) -> tuple[int, int] | None:
+    """Min and max of an absolute axis (EVIOCGABS ioctl), None if the fd is no evdev device."""
+    import fcntl
+    request = (2 << 30) | (24 << 16) | (ord("E") << 8) | (0x40 + code) # _IOR('E', 0x40 + code, input_absinfo)
+    try:
+        info = fcntl.ioctl(fd, request, bytes(24))
+    except OSError:
+        return None
+    _, minimum, maximum, *_ = struct.unpack("6i", info)
+    return minimum, maximum
+
+
+class EvdevReader:
+    """
+    Reads input events of a Linux evdev device (/dev/input/eventN) in a thread.
+    The thread waits in a selector on the device and on a pipe, so stop() wakes it
+    up at once instead of waiting for the next event. If the device is unplugged,
+    on_disconnect is called and the thread ends.
+
+    source is a device path or an already open file descriptor, e.g. the read end
+    of a pipe that a recorded event stream is written to.
+    callback(code_name, value, timestamp) is called from the reader thread for every
+    event in CODE_NAMES, timestamp is the event time in seconds.
+    """
+
+    def __init__(self, source, callback, on_disconnect=None, read_events: int = 64):
+        self.source = source
+        self.callback = callback
+        self.on_disconnect = on_disconnect
+        self.read_size = EVENT_SIZE * read_events
+
+        self.fd = None
+        self._thread = None
+        self._stop_r = None
+        self._stop_w = None
+
+    def open(self):
+        """Opens the device. Raises OSError if it cannot be opened."""
+        if self.fd is not None:
+            return
+        if isinstance(self.source, int):
+            self.fd = self.source
+            os.set_blocking(self.fd, False)
+        else:
+            self.fd = os.open(self.source, os.O_RDONLY | os.O_NONBLOCK)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.open()
+        self._stop_r, self._stop_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, name="EvdevReader", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 0.5):
+        """Wakes up the reader thread and waits until it has closed the device."""
+        if self._thread is None:
+            return
+        try:
+            os.write(self._stop_w, b"x")
+        except OSError:
+            pass # thread already gone
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        os.close(self._stop_w)
+        self._stop_w = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ================== Reader thread ==================
+    def _run(self):
+        disconnected = False
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.fd, selectors.EVENT_READ, "device")
+            selector.register(self._stop_r, selectors.EVENT_READ, "stop")
+            pending = b""
+            running = True
+            while running:
+                for key, _ in selector.select():
+                    if key.data == "stop":
+                        running = False
+                        break
+                    try:
+                        data = os.read(self.fd, self.read_size)
+                    except BlockingIOError:
+                        continue
+                    except OSError as e:
+                        if e.errno not in (errno.ENODEV, errno.EIO):
+                            log.error(f"Reading gamepad failed: {e}")
+                        disconnected = True
+                        running = False
+                        break
+                    if not data: # end of a recorded stream
+                        disconnected = True
+                        running = False
+                        break
+                    pending = self._dispatch(pending + data)
+
+        os.close(self.fd)
+        os.close(self._stop_r)
+        self.fd = None
+        self._stop_r = None
+        if disconnected and self.on_disconnect is not None:
+            self.on_disconnect()
+
+    def _dispatch(self, data: bytes) -> bytes:
+        """Handles all complete events in data, returns an incomplete rest."""
+        end = len(data) - len(data) % EVENT_SIZE
+        for sec, usec, ev_type, code, value in struct.iter_unpack(EVENT_FORMAT, data[:end]):
+            name = CODE_NAMES.get((ev_type, code))
+            if name is not None:
+                self.callback(name, value, sec + usec / 1e6)
+        return data[end:]
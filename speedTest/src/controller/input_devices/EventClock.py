@@ -0,0 +1,25 @@
+import time
+
+
+class EventClock:
+    """
+    Converts timestamps of a device clock (Tk event.time, evdev timestamps, ...)
+    to time.perf_counter_ns(), so events of all input devices share one clock.
+
+    The offset between both clocks is estimated as the smallest difference seen
+    so far, which belongs to the event that was delivered fastest. If the device
+    clock jumps back (wrap around, clock set), the offset is measured again.
+    """
+
+    def __init__(self, ns_per_unit: int, resync_ns: int = 1_000_000_000):
+        self.ns_per_unit = ns_per_unit # e.g. 1_000_000 for a clock in ms
+        self.resync_ns = resync_ns
+        self._offset = None
+
+    def to_perf_ns(self, device_time) -> int:
+        now = time.perf_counter_ns()
+        device_ns = int(device_time * self.ns_per_unit)
+        offset = now - device_ns
+        if self._offset is None or offset < self._offset or offset - self._offset > self.resync_ns:
+            self._offset = offset
+        return device_ns + self._offset
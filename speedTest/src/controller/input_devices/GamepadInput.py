@@ -1,14 +1,25 @@
+import sys
 import threading
 import time
 import logging as log
+import inputs
 from inputs import get_gamepad
-from inputs import devices
 
 from controller.input_devices.InputDevice import InputDevice
+from controller.input_devices.EventClock import EventClock
+from controller.input_devices.EvdevReader import EvdevReader, abs_range
+from controller.input_devices.DeviceRegistry import gamepad_paths
+from model.LatencyTracer import LatencyHistogram
 
 class GamepadInput(InputDevice):
-    def __init__(self, input_controller, aspect_ratio: float):
+    """
+    Gamepad cursor. On Linux the evdev device is read directly by an EvdevReader,
+    which can be stopped at once and notices when the gamepad is unplugged.
+    Elsewhere inputs.get_gamepad() is used, which blocks until the next event.
+    """
+    def __init__(self, input_controller, aspect_ratio: float, device_path: str = None):
         self.input_controller = input_controller
+        self.device_path = device_path if device_path is not None else self._find_device_path()
 
         # Current pointer coordinates normalized (0..1)
         self.pointer_x = 0.5
@@ -25,19 +36,41 @@ class GamepadInput(InputDevice):
 
         # Threading
         self._running = False
-        self._event_thread = None
+        self._event_thread = None # only used without evdev
+        self._reader: EvdevReader = None
         self._update_thread = None
         self._lock = threading.Lock()
+        self._clock = EventClock(ns_per_unit=1_000_000_000) # evdev timestamps are in s
 
         # Parameters
-        self.sensitivity = 0.05
+        self.max_speed = 1.0        # canvas widths per second at full deflection
+        self.response_exponent = 1.5 # 1 = linear, higher = finer control near the center
         self.deadzone = 0.1
-        self.update_interval = 0.05  # seconds
+        self.update_rate = 250      # pointer updates per second
+        self.max_step = 0.1         # seconds, longer gaps (e.g. system stall) are not integrated
         self.aspect_ratio = aspect_ratio
 
-    def _normalize(self, value):
-        """Convert raw input -32768..32767 to -1..1"""
-        return (2 * (value + 32768) / 65535) - 1
+        # Raw range of the stick axes, read from the device if possible
+        self.axis_ranges = {"ABS_X": (-32768, 32767), "ABS_Y": (-32768, 32767)}
+
+        # How late the update loop wakes up compared to its deadline
+        self.loop_jitter = LatencyHistogram()
+
+    @staticmethod
+    def _find_device_path():
+        """
+        evdev device of the first gamepad, None if there is none or not on Linux.
+        Listed again every time, so a gamepad plugged back in on another event node is found.
+        """
+        if not sys.platform.startswith("linux"):
+            return None
+        paths = gamepad_paths()
+        return paths[0] if paths else None
+
+    def _normalize(self, value, code: str = "ABS_X"):
+        """Convert raw input (e.g. -32768..32767) to -1..1"""
+        minimum, maximum = self.axis_ranges[code]
+        return (2 * (value - minimum) / (maximum - minimum)) - 1
 
     def _apply_deadzone(self, value):
         """Ignore small stick movements inside the deadzone"""
@@ -45,22 +78,49 @@ class GamepadInput(InputDevice):
             return 0.0
         return value
 
+    def _velocity(self, value):
+        """
+        Stick value (-1..1) to speed in canvas widths per second. The range outside
+        the deadzone is rescaled to 0..1, so the cursor starts moving smoothly.
+        """
+        magnitude = (abs(value) - self.deadzone) / (1 - self.deadzone)
+        if magnitude <= 0:
+            return 0.0
+        speed = self.max_speed * min(magnitude, 1.0) ** self.response_exponent
+        return speed if value > 0 else -speed
+
+    def _handle_event(self, code: str, value: int, timestamp: float):
+        """Stores the last stick values and handles buttons. Called from the reader thread."""
+        if code == "ABS_X":
+            with self._lock:
+                self.last_x = self._apply_deadzone(self._normalize(value, code))
+        elif code == "ABS_Y":
+            with self._lock:
+                self.last_y = self._apply_deadzone(self._normalize(value, code))
+        elif code in self._button_codes:
+            t_ns = self._clock.to_perf_ns(timestamp)
+            self._handle_button_event(code, bool(value), t_ns)
+
     def _event_loop(self):
-        """Thread: reads gamepad events and stores the last stick values"""
+        """Thread: reads gamepad events with the inputs package, if evdev cannot be used"""
         while self._running:
             events = get_gamepad()
+            if not self._running:
+                break # deactivated while waiting for this event
             for event in events:
-                if event.code == "ABS_X":
-                    with self._lock:
-                        self.last_x = self._apply_deadzone(self._normalize(event.state))
-                elif event.code == "ABS_Y":
-                    with self._lock:
-                        self.last_y = self._apply_deadzone(self._normalize(event.state))
-                elif event.code in self._button_codes:
-                    self._handle_button_event(event.code, bool(event.state))
+                self._handle_event(event.code, event.state, event.timestamp)
+
+    def _on_disconnect(self):
+        """Called by the reader thread if the gamepad was unplugged."""
+        log.warning("Gamepad disconnected.")
+        with self._lock:
+            self.last_x = 0.0
+            self.last_y = 0.0
+        for code in self._button_codes: # release a held button, so no drag or click hangs
+            self._handle_button_event(code, False)
 
 
-    def _handle_button_event(self, event_code, pressed: bool):
+    def _handle_button_event(self, event_code, pressed: bool, t_ns: int = None):
         """Update the button state and trigger click/release if needed"""
         with self._lock:
             # Update the pressed state of this button
@@ -70,59 +130,108 @@ class GamepadInput(InputDevice):
             if any(self._buttons_state.values()):
                 if not self._button_pressed:
                     self._button_pressed = True
-                    self.input_controller.left_click(self.pointer_x, self.pointer_y)
+                    self.input_controller.events.left_click(self.pointer_x, self.pointer_y, t_ns)
             else:  # All buttons released
                 if self._button_pressed:
                     self._button_pressed = False
-                    self.input_controller.left_release(self.pointer_x, self.pointer_y)
+                    self.input_controller.events.left_release(self.pointer_x, self.pointer_y, t_ns)
 
 
     def _update_loop(self):
-        """Thread: continuously updates the pointer position"""
+        """
+        Thread: integrates the stick velocity over the time that actually passed,
+        so the cursor speed does not depend on how exactly the thread is woken.
+        Runs on fixed deadlines (update_rate), a late wake-up does not shift the following ones.
+        """
+        period_ns = int(1e9 / self.update_rate)
         last_reported_pointer = (self.pointer_x, self.pointer_y)
+        last_ns = time.perf_counter_ns()
+        deadline = last_ns + period_ns
         while self._running:
+            delay = deadline - time.perf_counter_ns()
+            if delay > 0:
+                time.sleep(delay / 1e9)
+            now = time.perf_counter_ns()
+            self.loop_jitter.add(now - deadline)
+            deadline += period_ns
+            if deadline <= now: # fell behind by more than a period, skip the missed updates
+                deadline = now + period_ns
+
+            dt = min((now - last_ns) / 1e9, self.max_step)
+            last_ns = now
+
             with self._lock:
-                move_x = self.last_x
-                move_y = self.last_y
+                speed_x = self._velocity(self.last_x)
+                speed_y = self._velocity(self.last_y)
 
-            # Move pointer
-            self.pointer_x += move_x * self.sensitivity
-            self.pointer_y -= move_y * self.sensitivity * self.aspect_ratio  # Y inverted
+                # Move pointer, y speed is scaled so both axes move the same pixels per second
+                self.pointer_x += speed_x * dt
+                self.pointer_y -= speed_y * dt * self.aspect_ratio  # Y inverted
 
-            # Clamp to 0..1
-            self.pointer_x = max(0.0, min(1.0, self.pointer_x))
-            self.pointer_y = max(0.0, min(1.0, self.pointer_y))
+                # Clamp to 0..1
+                self.pointer_x = max(0.0, min(1.0, self.pointer_x))
+                self.pointer_y = max(0.0, min(1.0, self.pointer_y))
+                pointer = (self.pointer_x, self.pointer_y)
 
             # Only report if the position actually changed
-            if (round(self.pointer_x, 4), round(self.pointer_y, 4)) != (
+            if (round(pointer[0], 4), round(pointer[1], 4)) != (
                 round(last_reported_pointer[0], 4),
                 round(last_reported_pointer[1], 4),
             ):
-                self.input_controller.move_to(self.pointer_x, self.pointer_y)
-                last_reported_pointer = (self.pointer_x, self.pointer_y)
-
-            time.sleep(self.update_interval)
+                self.input_controller.events.move_to(pointer[0], pointer[1], now)
+                last_reported_pointer = pointer
 
     def activate(self):
         """Starts the gamepad listener threads"""
         if self._running:
             return
         self._running = True
-        self._event_thread = threading.Thread(target=self._event_loop, daemon=True)
+        self.loop_jitter = LatencyHistogram()
+        if not self._start_reader():
+            # inputs enumerates the gamepads only on import, so get_gamepad() would read a
+            # gamepad that was unplugged since. Runs in the main thread when the device is selected.
+            inputs.devices = inputs.DeviceManager()
+            self._event_thread = threading.Thread(target=self._event_loop, daemon=True)
+            self._event_thread.start()
         self._update_thread = threading.Thread(target=self._update_loop, daemon=True)
-        self._event_thread.start()
         self._update_thread.start()
 
+    def _start_reader(self) -> bool:
+        """Reads the device with an EvdevReader. Returns False if that is not possible."""
+        if self.device_path is None:
+            return False
+        reader = EvdevReader(self.device_path, self._handle_event, self._on_disconnect)
+        try:
+            reader.open()
+        except OSError as e:
+            log.warning(f"Cannot open {self.device_path} ({e}), reading gamepad with the inputs package.")
+            return False
+        for code, axis in (("ABS_X", 0x00), ("ABS_Y", 0x01)):
+            axis_range = abs_range(reader.fd, axis)
+            if axis_range and axis_range[0] < axis_range[1]:
+                self.axis_ranges[code] = axis_range
+        reader.start()
+        self._reader = reader
+        return True
+
     def deactivate(self):
         """Stops the gamepad listener threads"""
         self._running = False
-        if self._event_thread:
-            self._event_thread.join(timeout=1)
+        if self._reader:
+            self._reader.stop() # returns as soon as the reader thread woke up
+            self._reader = None
+        # A thread blocked in get_gamepad() only ends after the next event. It is a
+        # daemon thread and ignores that event, so it is not waited for.
+        self._event_thread = None
         if self._update_thread:
-            self._update_thread.join(timeout=1)
+            self._update_thread.join(timeout=1) # wakes up at least every update period
+        jitter = self.loop_jitter.summary()
+        if jitter["count"]:
+            log.info(f"Gamepad update loop ({self.update_rate} Hz) woke up late by p50 {jitter['p50_ms']} ms, "
+                     f"p99 {jitter['p99_ms']} ms, max {jitter['max_ms']} ms")
 
     def gamepad_connected(self):
-        if devices.gamepads:
+        if inputs.devices.gamepads:
             return True
         else:
             return False
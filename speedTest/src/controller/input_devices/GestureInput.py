@@ -1,31 +1,57 @@
+import queue
+import time
+import logging as log
 import cv2
 import mediapipe as mp
 import numpy as np
 from threading import Thread
 from controller.input_devices.InputDevice import InputDevice
+from controller.input_devices.CaptureProfile import CaptureProfile
+from model.LatencyTracer import LatencyHistogram
 
 mp_hands = mp.solutions.hands
 
+
 class GestureInput(InputDevice):
     """
     Handgesten-Input. Erkennt Faust und Handbewegungen.
-    Kommuniziert nur über den CursorController.
+    Kommuniziert nur über den InputController.
+
+    Capture and inference run in separate threads. The capture thread only keeps
+    the newest frame, so if inference is slower than the camera, old frames are
+    dropped instead of piling up and delaying the cursor.
     """
-    def __init__(self, cursor_controller):
+    def __init__(self, cursor_controller, profile: CaptureProfile = None):
         super().__init__(cursor_controller)
+        self.profile = profile if profile is not None else CaptureProfile()
         self.active = False
-        self.thread = None
+        self.capture_thread = None
+        self.inference_thread = None
         self.click_hold = False
 
+        self._frames = queue.Queue(maxsize=1) # (t_ns, frame), newest frame only
+        self.dropped_frames = 0
+        self.frame_age = LatencyHistogram() # capture -> cursor event
+
     def activate(self):
         self.active = True
-        self.thread = Thread(target=self._hand_tracking, daemon=True)
-        self.thread.start()
+        self._frames = queue.Queue(maxsize=1) # no frame of an earlier activation
+        self.dropped_frames = 0
+        self.frame_age = LatencyHistogram()
+        self.capture_thread = Thread(target=self._capture, name="GestureCapture", daemon=True)
+        self.inference_thread = Thread(target=self._hand_tracking, name="GestureInference", daemon=True)
+        self.capture_thread.start()
+        self.inference_thread.start()
 
     def deactivate(self):
         self.active = False
-        if self.thread is not None:
-            self.thread.join(timeout=1)
+        for thread in (self.capture_thread, self.inference_thread):
+            if thread is not None:
+                thread.join(timeout=1)
+        age = self.frame_age.summary()
+        if age["count"]:
+            log.info(f"Hand tracking: {age['count']} frames tracked, {self.dropped_frames} dropped, "
+                     f"capture to cursor p50 {age['p50_ms']} ms, p95 {age['p95_ms']} ms")
 
     def _is_fist(self, hand_landmarks):
         wrist = hand_landmarks.landmark[0]
@@ -54,19 +80,69 @@ class GestureInput(InputDevice):
         y = np.mean([p.y for p in points])
         return x, y
 
+    # ================== Capture thread ==================
+    def _open_camera(self):
+        profile = self.profile
+        cap = cv2.VideoCapture(profile.camera)
+        for prop, value in ((cv2.CAP_PROP_FRAME_WIDTH, profile.width),
+                            (cv2.CAP_PROP_FRAME_HEIGHT, profile.height),
+                            (cv2.CAP_PROP_FPS, profile.fps),
+                            (cv2.CAP_PROP_BUFFERSIZE, profile.buffer_size)):
+            if value is not None:
+                cap.set(prop, value) # not every backend supports every property, ignored then
+        return cap
+
+    def _offer(self, item):
+        """Puts a frame into the queue, replacing a frame that was not taken yet."""
+        try:
+            self._frames.put_nowait(item)
+        except queue.Full:
+            try:
+                self._frames.get_nowait()
+                self.dropped_frames += 1
+            except queue.Empty:
+                pass
+            self._frames.put_nowait(item) # only this thread puts, so there is room now
+
+    def _capture(self):
+        cap = self._open_camera()
+        try:
+            while self.active:
+                if not cap.grab():
+                    log.error("Camera stopped delivering frames.")
+                    break
+                t_ns = time.perf_counter_ns() # capture time of this frame
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                self._offer((t_ns, frame))
+        finally:
+            cap.release()
+            self.active = False
+
+    # ================== Inference thread ==================
+    def _prepare(self, frame):
+        """Scales the frame down for inference, mirrors it and converts it to RGB."""
+        width = self.profile.inference_width
+        if width and frame.shape[1] > width:
+            height = round(frame.shape[0] * width / frame.shape[1])
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        frame = cv2.flip(frame, 1)
+        return frame, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
     def _hand_tracking(self):
-        cap = cv2.VideoCapture(0)
         with mp_hands.Hands(
             max_num_hands=1,
+            model_complexity=self.profile.model_complexity,
             min_detection_confidence=0.9,
             min_tracking_confidence=0.7
         ) as hands:
             while self.active:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                frame = cv2.flip(frame, 1)
-                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                try:
+                    t_ns, frame = self._frames.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                frame, rgb = self._prepare(frame)
                 results = hands.process(rgb)
 
                 if results.multi_hand_landmarks:
@@ -74,25 +150,27 @@ class GestureInput(InputDevice):
                         fist = self._is_fist(hand_landmarks)
                         hx, hy = self._hand_center(hand_landmarks)
 
-                        # Übergabe an CursorController (x/y normiert zwischen 0 und 1)
-                        self.input_controller.move_to(hx, hy)
+                        # Übergabe an InputController über die Queue (x/y normiert zwischen 0 und 1)
+                        self.input_controller.events.move_to(hx, hy, t_ns)
 
                         if fist:
                             if not self.click_hold:
-                                self.input_controller.left_click(hx, hy)
+                                self.input_controller.events.left_click(hx, hy, t_ns)
                                 self.click_hold = True
                         else:
                             if self.click_hold:
-                                self.input_controller.left_release(hx, hy)
+                                self.input_controller.events.left_release(hx, hy, t_ns)
                                 self.click_hold = False
+                    self.frame_age.add(time.perf_counter_ns() - t_ns)
 
                 # optional Debugkamera
-                cv2.imshow("Handkamera (Debug)", frame)
-                if cv2.waitKey(1) & 0xFF == 27:  # ESC
-                    break
+                if self.profile.show_debug:
+                    cv2.imshow("Handkamera (Debug)", frame)
+                    if cv2.waitKey(1) & 0xFF == 27:  # ESC
+                        self.active = False
 
-        cap.release()
-        cv2.destroyAllWindows()
+        if self.profile.show_debug:
+            cv2.destroyAllWindows()
 
 
     def get_name(self):
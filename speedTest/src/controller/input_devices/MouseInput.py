@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING
 
 import tkinter as tk
 from controller.input_devices.InputDevice import InputDevice
+from controller.input_devices.EventClock import EventClock
 
 if TYPE_CHECKING:
     from controller.InputController import InputController
@@ -16,6 +17,7 @@ class MouseInput(InputDevice):
         self._left_click_event = '<Button-1>'
         self._left_release_event = '<ButtonRelease-1>'
         self._right_click_event = '<Button-3>'
+        self._clock = EventClock(ns_per_unit=1_000_000) # event.time is in ms
 
     def activate(self):
         self.canvas.bind(self._motion_event, self._on_motion)
@@ -28,29 +30,18 @@ class MouseInput(InputDevice):
         self.canvas.unbind(self._left_click_event)
         self.canvas.unbind(self._left_release_event)
 
-    def _normalize(self, x, y):
-        """Convert absolute canvas coordinates to normalized (0..1)."""
-        width = self.canvas.winfo_width()
-        height = self.canvas.winfo_height()
-        nx = x / width if width > 0 else 0
-        ny = y / height if height > 0 else 0
-        return nx, ny
-
+    # Tk already gives canvas pixels, no need to normalize
     def _on_motion(self, event):
-        nx, ny = self._normalize(event.x, event.y)
-        self.input_controller.move_to(nx, ny)
+        self.input_controller.move_to_pixels(event.x, event.y, self._clock.to_perf_ns(event.time))
 
     def _on_left_click(self, event):
-        nx, ny = self._normalize(event.x, event.y)
-        self.input_controller.left_click(nx, ny)
+        self.input_controller.left_click_pixels(event.x, event.y, self._clock.to_perf_ns(event.time))
 
     def _on_left_release(self, event):
-        nx, ny = self._normalize(event.x, event.y)
-        self.input_controller.left_release(nx, ny)
+        self.input_controller.left_release_pixels(event.x, event.y, self._clock.to_perf_ns(event.time))
 
     def _on_right_click(self, event):
-        nx, ny = self._normalize(event.x, event.y)
-        self.input_controller.right_click(nx, ny)
+        self.input_controller.right_click_pixels(event.x, event.y, self._clock.to_perf_ns(event.time))
 
     def get_name(self):
         return "Mouse"
\ No newline at end of file
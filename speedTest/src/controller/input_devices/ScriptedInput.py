@@ -0,0 +1,76 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import random
+import time
+
+from controller.ContainsVisitor import ContainsVisitor
+from model.BoundsVisitor import BoundsVisitor
+
+if TYPE_CHECKING:
+    from controller.Controller import Controller
+
+
+class ScriptedInput:
+    """
+    Simulated participant for headless tests.
+    Clicks the start button, then clicks the active shape after a random
+    reaction time (normal distribution) and misses with probability miss_rate.
+    Clicks are scheduled on the controller's scheduler and sent to the state in
+    pixel coordinates, like InputController does for real devices.
+    """
+    def __init__(self, controller: Controller, width: int, height: int,
+                 reaction_ms: float = 350, jitter_ms: float = 80, miss_rate: float = 0.05, seed: int = None):
+        self.controller = controller
+        self.width = width
+        self.height = height
+        self.reaction_ms = reaction_ms
+        self.jitter_ms = jitter_ms
+        self.miss_rate = miss_rate
+        self.rng = random.Random(seed)
+
+        self._bounds = BoundsVisitor()
+        self._contains = ContainsVisitor()
+        self.handler_ns: list[int] = [] # time spent in the state per click
+
+    def start(self):
+        """Clicks the start button, the test then runs on the scheduler."""
+        x1, y1, x2, y2 = self.controller.view.start_button_coords
+        self._click((x1 + x2) // 2, (y1 + y2) // 2)
+        self.handler_ns.clear() # only clicks during the test are measured
+        if self.controller.state is self.controller.running_state:
+            self._schedule_next()
+
+    def _schedule_next(self):
+        delay = max(50.0, self.rng.gauss(self.reaction_ms, self.jitter_ms))
+        self.controller.scheduler.after(round(delay), self._click_target)
+
+    def _click_target(self):
+        if self.controller.state is not self.controller.running_state:
+            return # test is over
+        shape = self.controller.model.shape_active
+        if self.rng.random() < self.miss_rate:
+            x, y = self._miss_position(shape)
+        else:
+            shape.accept(self._bounds)
+            x0, y0, x1, y1 = self._bounds.result
+            x, y = int((x0 + x1) / 2), int((y0 + y1) / 2) # center is inside every shape type
+        self._click(x, y)
+        self._schedule_next()
+
+    def _miss_position(self, shape):
+        for _ in range(100):
+            x, y = self.rng.randrange(self.width), self.rng.randrange(self.height)
+            self._contains.set_position(x, y)
+            shape.accept(self._contains)
+            if not self._contains.result:
+                return x, y
+        return -1, -1
+
+    def _click(self, x: int, y: int):
+        t_ns = self.controller.scheduler.monotonic_ns()
+        start = time.perf_counter_ns()
+        self.controller.state.canvas_motion(x, y)
+        self.controller.state.canvas_left_click(x, y, t_ns)
+        self.controller.state.canvas_left_release(x, y)
+        self.handler_ns.append(time.perf_counter_ns() - start)
@@ -7,43 +7,37 @@ from controller.state.State import State
 from controller.UpdateVisitor import UpdateVisitor
 from model.Model import DuplicateIDError
 
+# While dragging, the canvas is updated at most once per frame (~60 fps)
+DRAG_FRAME_MS = 16
+
 if TYPE_CHECKING:
     from model.shapes import Shape
     from pathlib import Path
 
 class EditState(State):
     def on_enter(self):
-        # set UI state
-        view = self.controller.view
-
         # Force mouse input
-        view.input_dropdown.current(0)
-        view.input_dropdown.configure(state="disabled")
         self.controller.input_controller.change_device("Mouse")
-        view.hide_start_button()
-
-        # Buttons
-        view.stop_btn.config(state="disabled")
-        view.show_edit_ui()
-
-        # Menu
-        view.config_menu.entryconfig("Edit Config", state="disabled")
-        view.config_menu.entryconfig("Load Config", state="normal")
+        self.controller.view.show_edit_ui()
 
         # Remembering shape and position for drag and drop
         self._dragged_shape = None
         self._dragged_offset_x = 0
         self._dragged_offset_y = 0
+        self._drag_pos = None # latest pointer position, not yet drawn
+        self._drag_drawn = None # position of the shape as currently drawn on the canvas
+        self._drag_job = None
         
         log.info("Entered edit state.")
 
-    def canvas_left_click(self, x: int, y: int):
+    def canvas_left_click(self, x: int, y: int, t_ns: int = None):
         shape = self._check_shape_hit(x, y)
         if shape:
             self._dragged_shape = shape
             # Calculate offset (click pos - shape pos)
             self._dragged_offset_x = x - shape.x
             self._dragged_offset_y = y - shape.y
+            self._drag_drawn = (shape.x, shape.y)
 
             
     def canvas_right_click(self, x: int, y: int):
@@ -56,21 +50,45 @@ class EditState(State):
         self.controller.view.new_shape_dialog(x, y)
 
     def _check_shape_hit(self, x: int, y: int) -> Shape|None:
-        """Returns the first shape hit or None"""
+        """Returns the topmost shape hit or None"""
         visitor = self.controller.contains_visitor
-        for shape in self.controller.model.shapes:
-            visitor.set_position(x, y)
+        visitor.set_position(x, y)
+        # spatial index only returns shapes whose bounding box contains the point
+        for shape in self.controller.model.shapes_at(x, y):
             shape.accept(visitor)
             if visitor.result:
                 return shape
         return None
     
     def canvas_motion(self, x: int, y: int):
-        self._update_from_dnd(x, y, False) # No snapshot
+        """
+        While dragging only the canvas item of the dragged shape is moved,
+        coalesced to one move per frame. The model is updated on release.
+        """
+        if self._dragged_shape:
+            self._drag_pos = (x, y)
+            if self._drag_job is None:
+                self._drag_job = self.controller.scheduler.after(DRAG_FRAME_MS, self._draw_drag)
+
+    def _draw_drag(self):
+        self._drag_job = None
+        if not self._dragged_shape or self._drag_pos is None:
+            return
+        x, y = self._drag_pos
+        new_x = x - self._dragged_offset_x
+        new_y = y - self._dragged_offset_y
+        old_x, old_y = self._drag_drawn
+        if (new_x, new_y) != (old_x, old_y):
+            self.controller.view.move_shape(self._dragged_shape, new_x - old_x, new_y - old_y)
+            self._drag_drawn = (new_x, new_y)
     
     def canvas_left_release(self, x: int, y: int):
+        if self._drag_job is not None:
+            self.controller.scheduler.after_cancel(self._drag_job)
+            self._drag_job = None
         self._update_from_dnd(x, y)
         self._dragged_shape = None
+        self._drag_pos = None
     
     def _update_from_dnd(self, x: int, y: int, snapshot=True):
         if self._dragged_shape:
@@ -80,37 +98,55 @@ class EditState(State):
 
     def update_shape(self, values, shape, snapshot=True):
         visitor = UpdateVisitor(values)
-        shape.accept(visitor)
-        self.controller.model.notify() # calling notify here, as the visitor does not acces the model, but the shaped directly
-        if snapshot:
-            self.controller.model.snapshot() # snapshot AFTER change, current state is snapshot
+        model = self.controller.model
+        with model.batch(): # one redraw for change and snapshot
+            shape.accept(visitor)
+            model.shape_changed(shape) # the visitor does not acces the model, but the shape directly
+            if snapshot:
+                model.snapshot() # snapshot AFTER change, current state is snapshot
         
 
     def set_timer_duration(self, duration):
-        self.controller.model.set_timer_duration(duration)
-        self.controller.model.snapshot() # snapshot after change
+        with self.controller.model.batch():
+            self.controller.model.set_timer_duration(duration)
+            self.controller.model.snapshot() # snapshot after change
 
     def add_shape_from_dialog(self, values):
         try:
-            self.controller.model.add_shape(values.pop("type"), **values)
-            self.controller.model.snapshot() # snapshot after change
+            with self.controller.model.batch():
+                self.controller.model.add_shape(values.pop("type"), **values)
+                self.controller.model.snapshot() # snapshot after change
         except DuplicateIDError:
             self.controller.view.show_id_error(values["id"])
 
     def delete_shape(self, shape):
-        self.controller.model.delete_shape(shape)
-        self.controller.model.snapshot() # snapshot after change
+        with self.controller.model.batch():
+            self.controller.model.delete_shape(shape)
+            self.controller.model.snapshot() # snapshot after change
 
     def load_config(self, config_path: Path):
         self.controller._load_config(config_path)
 
-    def export_log(self, filepath: Path, type: str):
-        self.controller._export_log(filepath, type)
+    def export_log(self, filepath: Path, type: str, compression: str = None):
+        self.controller._export_log(filepath, type, compression)
 
     def export_config(self, filepath: Path):
         self.controller._export_config(filepath)
 
+    def set_log_streaming(self, enabled: bool):
+        self.controller._set_log_streaming(enabled)
+
+    def set_latency_tracing(self, enabled: bool):
+        self.controller._set_latency_tracing(enabled)
+
+    def set_target_order(self, order: str):
+        self.controller._set_target_order(order)
+
     def exit_edit_mode(self):
+        if self._drag_job is not None:
+            self.controller.scheduler.after_cancel(self._drag_job)
+            self._drag_job = None
+        self._dragged_shape = None
         self.controller.state = self.controller.idle_state
         self.controller.state.on_enter()
 
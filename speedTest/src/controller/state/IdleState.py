@@ -11,24 +11,11 @@ if TYPE_CHECKING:
 
 class IdleState(State):
     def on_enter(self):
-        # set UI state
-        view = self.controller.view
-        view.input_dropdown.configure(state="normal")
-        
-        # Button
-        view.stop_btn.configure(state="disabled")
-        view.show_start_button()
-        view.hide_stop_button()
-        view.hide_edit_ui()
-
-        # Menu
-        view.config_menu.entryconfig("Edit Config", state="normal")
-        view.config_menu.entryconfig("Load Config", state="normal")
-        
+        self.controller.view.show_idle_ui()
         log.info("Entered idle state.")
         
 
-    def canvas_left_click(self, x: int, y: int):
+    def canvas_left_click(self, x: int, y: int, t_ns: int = None):
         """Checks if the start button was clicked."""
         view = self.controller.view
         if view.start_button_coords:
@@ -41,15 +28,29 @@ class IdleState(State):
     def on_device_change(self, event):
         self.controller.input_controller.change_device(event.widget.get())
 
+    def device_disconnected(self, name: str):
+        log.warning(f"Input device {name} disconnected, switching to Mouse.")
+        self.controller.input_controller.change_device("Mouse")
+        self.controller.view.show_input_device("Mouse")
+
     def load_config(self, config_path: Path):
         self.controller._load_config(config_path)
 
-    def export_log(self, filepath: Path, type: str):
-        self.controller._export_log(filepath, type)
+    def export_log(self, filepath: Path, type: str, compression: str = None):
+        self.controller._export_log(filepath, type, compression)
 
     def export_config(self, filepath: Path):
         self.controller._export_config(filepath)
 
+    def set_log_streaming(self, enabled: bool):
+        self.controller._set_log_streaming(enabled)
+
+    def set_latency_tracing(self, enabled: bool):
+        self.controller._set_latency_tracing(enabled)
+
+    def set_target_order(self, order: str):
+        self.controller._set_target_order(order)
+
     def edit_mode(self):
         """Switch to edit state"""
         self.controller.state = self.controller.edit_state
@@ -60,6 +61,9 @@ class IdleState(State):
         if not self.controller.model.shapes:
             log.warning("Cannot start test without shapes.")
             return
+        if self.controller.model.config_loader.busy():
+            log.warning("Cannot start test while a config is loading.")
+            return
 
         self.controller.state = self.controller.running_state
         self.controller.state.on_enter()
\ No newline at end of file
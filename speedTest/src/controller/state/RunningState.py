@@ -2,49 +2,50 @@ import logging as log
 from typing import TYPE_CHECKING
 
 from controller.state.State import State
+from controller.SessionTimer import SessionTimer
 
 
 
 class RunningState(State):
     def __init__(self, controller):
         super().__init__(controller)
-        self._timer_job = None
+        self.timer: SessionTimer = None
 
     def on_enter(self):
-        # Set ui state
-        view = self.controller.view
-        view.input_dropdown.configure(state="disabled")
-        view.hide_start_button()
-        view.show_stop_button()
+        self.controller.view.show_running_ui()
 
-        view.config_menu.entryconfig("Edit Config", state="disabled")
-        view.config_menu.entryconfig("Load Config", state="disabled")
-        
-        
         # Start test
         model = self.controller.model
-        model.clear_log()
+        model.begin_session()
+        model.prepare_targets() # whole sequence before the timer starts, each hit only moves a cursor
         model.next_shape()
         self._start_timer(model.timer_duration)
 
         log.info("Entered RunningState.")
 
 
-    def canvas_left_click(self, x: int, y: int):
+    def canvas_left_click(self, x: int, y: int, t_ns: int = None):
         """Checks if the active shape was clicked and recording the click in the model."""
+        if self.timer.expired(t_ns):
+            # the last tick has not run yet, the test is already over
+            log.debug("Click after the end of the test rejected.")
+            self.timer.rejected_clicks += 1
+            self.stop_test()
+            return
         self.controller.contains_visitor.set_position(x, y)
         self.controller.model.shape_active.accept(self.controller.contains_visitor)
         if self.controller.contains_visitor.result:
             log.debug("Active shape clicked.")
-            self.controller.model.register_click(True, x, y)
+            self.controller.model.register_click(True, x, y, t_ns)
             self.controller.model.next_shape()
         else:
             log.debug("Active shape missed.")
-            self.controller.model.register_click(False, x, y)
+            self.controller.model.register_click(False, x, y, t_ns)
 
 
     def stop_test(self):
         self._stop_timer()
+        self.controller.model.end_session(self.timer.to_dict())
         self.controller.model.set_no_active_shape()
         self.controller.state = self.controller.idle_state
         self.controller.state.on_enter()
@@ -52,27 +53,17 @@ class RunningState(State):
 
 
     # ================== Timer ==================
-    def _start_timer(self, duration: int):
-        """Start the countdown timer."""
-        self.time_remaining = duration
-        self._tick()
-
-    def _tick(self):
-        """Update the timer each second and stop the task when it reaches zero."""
-        if self.time_remaining <= 0:
-            self.stop_test()
-            return
-
-        view = self.controller.view
-        view.update_timer(self.time_remaining)
-        self.time_remaining -= 1
-        self._timer_job = view.root.after(1000, self._tick) # Call this method in 1s
+    def _start_timer(self, duration: float):
+        """Start the countdown timer, the test ends at start + duration."""
+        self.timer = SessionTimer(self.controller.scheduler, duration,
+                                  on_tick=self.controller.view.update_timer,
+                                  on_expired=self.stop_test)
+        self.timer.start()
 
     def _stop_timer(self):
         """Stop the countdown timer."""
-        view = self.controller.view
-
-        if self._timer_job:
-            view.root.after_cancel(self._timer_job)
-            self._timer_job = None
-        view.update_timer(self.controller.model.timer_duration)
+        self.timer.stop()
+        timing = self.timer.to_dict()
+        log.info(f"Test ran {timing['actual_s']:.3f}s of {timing['duration_s']}s, "
+                 f"ticks late by p99 {timing['tick_jitter'].get('p99_ms', 0)} ms.")
+        self.controller.view.update_timer(self.controller.model.timer_duration)
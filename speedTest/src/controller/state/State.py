@@ -17,7 +17,7 @@ class State:
     def on_enter():
         raise NotImplementedError
 
-    def canvas_left_click(self, x: int, y: int):
+    def canvas_left_click(self, x: int, y: int, t_ns: int = None):
         raise NotImplementedError
     
     def canvas_left_release(self, x: int, y: int):
@@ -38,6 +38,9 @@ class State:
     def on_device_change(self, event: Event):
         log.warning("Device cannot be changed in this state.")
 
+    def device_disconnected(self, name: str):
+        log.warning(f"Input device {name} disconnected, switching to Mouse once back in idle.")
+
     def edit_mode(self):
         log.warning("Cannot enter edit mode in this state.")
 
@@ -53,12 +56,21 @@ class State:
     def add_shape_from_dialog(self, values: dict):
         log.warning("Cannot add a shape in this state.")
 
-    def export_log(self, filepath: Path, type: str):
+    def export_log(self, filepath: Path, type: str, compression: str = None):
         log.warning("Cannot export click log in this state.")
 
     def export_config(self, filepath: Path):
         log.warning("Cannot export config in this state.")
 
+    def set_log_streaming(self, enabled: bool):
+        log.warning("Cannot change click streaming in this state.")
+
+    def set_latency_tracing(self, enabled: bool):
+        log.warning("Cannot change latency tracing in this state.")
+
+    def set_target_order(self, order: str):
+        log.warning("Cannot change the target order in this state.")
+
     def delete_shape(self, shape: Shape):
         log.warning("Cannot delete a shape in this state.")
 
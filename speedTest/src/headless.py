@@ -0,0 +1,133 @@
+"""
+Runs timed tests without a display, driven by a simulated participant.
+Used to validate configs and to measure the model / controller pipeline in
+batch jobs, e.g.:
+
+    python src/headless.py config/default.json --sessions 1000 --output report.json
+"""
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from model.Model import Model
+from model.TargetSchedule import ROUND_ROBIN, strategies
+from controller.Controller import Controller
+from controller.Scheduler import VirtualScheduler
+from controller.input_devices.ScriptedInput import ScriptedInput
+from view.HeadlessView import HeadlessView
+
+
+class HeadlessSession:
+    """Model, Controller and states wired to a HeadlessView and a VirtualScheduler."""
+
+    def __init__(self, config_path: Path, width: int = 1000, height: int = 770, target_order: str = ROUND_ROBIN):
+        self.model = Model()
+        self.model.set_target_order(target_order)
+        self.controller = Controller(self.model)
+        self.view = HeadlessView(self.model, width, height)
+        self.scheduler = VirtualScheduler()
+
+        # same late init as in main.py
+        self.controller.view = self.view
+        self.controller.scheduler = self.scheduler
+        self.model.scheduler = self.scheduler
+        self.controller.state.on_enter()
+
+        if not self.model.load_config(Path(config_path)):
+            raise ValueError(f"Config {config_path} could not be loaded")
+
+    def run(self, reaction_ms: float = 350, jitter_ms: float = 80, miss_rate: float = 0.05,
+            seed: int = None, export_path: Path = None) -> dict:
+        """Runs one full test and returns its statistics."""
+        participant = ScriptedInput(self.controller, self.view.width, self.view.height,
+                                    reaction_ms, jitter_ms, miss_rate, seed)
+        self.model.target_seed = seed # same target sequence for the same seed
+        start_ns = time.perf_counter_ns()
+        start_updates = self.view.updates
+        participant.start()
+        self.scheduler.run()
+        wall_ns = time.perf_counter_ns() - start_ns
+
+        if export_path is not None:
+            self.model.export_click_log_csv(export_path)
+
+        hits = sum(self.model.click_log.column("shape_hit"))
+        return {
+            "clicks": len(self.model.click_log),
+            "hits": hits,
+            "misses": len(self.model.click_log) - hits,
+            "duration_s": self.model.session_timing["actual_s"],
+            "wall_s": wall_ns / 1e9,
+            "handler_ns": participant.handler_ns,
+            "view_updates": self.view.updates - start_updates,
+        }
+
+
+def _percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run speed tests without a display.")
+    parser.add_argument("config", type=Path, help="config file to test")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first session, incremented per session")
+    parser.add_argument("--reaction-ms", type=float, default=350)
+    parser.add_argument("--jitter-ms", type=float, default=80)
+    parser.add_argument("--miss-rate", type=float, default=0.05)
+    parser.add_argument("--target-order", choices=list(strategies), default=ROUND_ROBIN)
+    parser.add_argument("--export-dir", type=Path, help="write the click log of every session as CSV")
+    parser.add_argument("--output", type=Path, help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    try:
+        session = HeadlessSession(args.config, target_order=args.target_order)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    results = []
+    start = time.perf_counter()
+    for i in range(args.sessions):
+        export_path = args.export_dir / f"session_{i:05d}.csv" if args.export_dir else None
+        results.append(session.run(args.reaction_ms, args.jitter_ms, args.miss_rate,
+                                   args.seed + i, export_path))
+    wall_s = time.perf_counter() - start
+
+    handler_ns = [ns for r in results for ns in r["handler_ns"]]
+    clicks = sum(r["clicks"] for r in results)
+    report = {
+        "config": str(args.config),
+        "target_order": args.target_order,
+        "sessions": args.sessions,
+        "clicks": clicks,
+        "hits_mean": statistics.fmean(r["hits"] for r in results) if results else 0,
+        "duration_s_mean": statistics.fmean(r["duration_s"] for r in results) if results else 0,
+        "wall_s": wall_s,
+        "sessions_per_s": args.sessions / wall_s if wall_s else 0,
+        "clicks_per_s": clicks / wall_s if wall_s else 0,
+        "click_handler_us": {
+            "p50": _percentile(handler_ns, 50) / 1000,
+            "p95": _percentile(handler_ns, 95) / 1000,
+            "p99": _percentile(handler_ns, 99) / 1000,
+        },
+    }
+
+    text = json.dumps(report, indent=4)
+    if args.output:
+        args.output.write_text(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,7 @@
 #     "inputs",
 #     "mediapipe",
 #     "opencv-python",
+#     "pyarrow",
 # ]
 # ///
 
@@ -13,6 +14,7 @@ import logging
 from model.Model import Model
 from controller.Controller import Controller
 from controller.InputController import InputController
+from controller.Scheduler import TkScheduler
 from view.View import View
 
 logging.basicConfig(
@@ -24,6 +26,7 @@ root = tk.Tk()
 
 # MVC setup
 model = Model()
+model.set_log_streaming(True) # crash safe copy of every click in logs/stream
 controller = Controller(model)
 view = View(root, model, controller)
 input_controller = InputController(controller, view)
@@ -31,9 +34,14 @@ input_controller = InputController(controller, view)
 
 # late init for things that interact with the controller and view
 controller.view = view
+controller.scheduler = TkScheduler(root)
+model.scheduler = controller.scheduler # changes are drawn once per idle cycle
 controller.input_controller = input_controller
+input_controller.start_event_pump() # events of gamepad / hand tracking threads
 controller.state.on_enter() # This references controller.view
 view.on_config_selected() # load first config in folder. Needs the controller.
 
 # start of main loop
 root.mainloop()
+view.device_discovery.stop()
+model.shutdown()
@@ -0,0 +1,25 @@
+from model.shapes import *
+
+class BoundsVisitor:
+    """
+    Visitor that computes the bounding box (x0, y0, x1, y1) of a shape.
+    x, y of each shape is the top-left of the bounding box.
+    """
+    def __init__(self):
+        self.result = None
+
+    def visit_square(self, square: Square):
+        self.result = (square.x, square.y, square.x + square.size, square.y + square.size)
+
+    def visit_circle(self, circle: Circle):
+        d = 2 * circle.radius
+        self.result = (circle.x, circle.y, circle.x + d, circle.y + d)
+
+    def visit_rectangle(self, rect: Rectangle):
+        self.result = (rect.x, rect.y, rect.x + rect.width, rect.y + rect.height)
+
+    def visit_triangle(self, tri: Triangle):
+        self.result = (tri.x, tri.y, tri.x + tri.size, tri.y + tri.size)
+
+    def visit_ellipse(self, ellipse: Ellipse):
+        self.result = (ellipse.x, ellipse.y, ellipse.x + 2 * ellipse.rx, ellipse.y + 2 * ellipse.ry)
@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+
+# Kinds of changes. Shape changes carry the id of the shape.
+SHAPE_ADDED = "shape_added"
+SHAPE_REMOVED = "shape_removed"
+SHAPE_MOVED = "shape_moved" # position or size changed
+SHAPE_RESTYLED = "shape_restyled" # color or other attributes without geometry
+ACTIVE_CHANGED = "active_changed" # one change for the old and one for the new target
+SHAPES_REPLACED = "shapes_replaced" # all shapes may have changed, e.g. config load or undo
+TIMER_CHANGED = "timer_changed"
+HISTORY_CHANGED = "history_changed" # undo / redo availability may have changed
+
+# changes after which the whole scene has to be drawn again
+REDRAW_ALL = {SHAPE_ADDED, SHAPE_REMOVED, SHAPES_REPLACED}
+# changes that only touch the canvas items of single shapes
+REDRAW_SHAPE = {SHAPE_MOVED, SHAPE_RESTYLED, ACTIVE_CHANGED}
+
+
+@dataclass(frozen=True)
+class Change:
+    kind: str
+    shape_id: str = None
+
+
+class ChangeSet:
+    """
+    Changes of the model collected since the last delivery to the observers.
+    The same change is only kept once, so moving a shape three times in one
+    event turn is a single SHAPE_MOVED.
+    """
+
+    def __init__(self):
+        self._changes: dict[Change, None] = {} # ordered set
+        self._kinds: set[str] = set()
+
+    def add(self, change: Change):
+        self._changes[change] = None
+        self._kinds.add(change.kind)
+
+    def __contains__(self, kind: str) -> bool:
+        return kind in self._kinds
+
+    def __iter__(self):
+        return iter(self._changes)
+
+    def __len__(self):
+        return len(self._changes)
+
+    def __repr__(self):
+        return f"ChangeSet({list(self._changes)})"
+
+    def kinds(self) -> set[str]:
+        return set(self._kinds)
+
+    def needs_full_redraw(self) -> bool:
+        return not self._kinds.isdisjoint(REDRAW_ALL)
+
+    def changed_shape_ids(self) -> list[str]:
+        """Ids of shapes whose canvas item has to be updated, each once."""
+        return list(dict.fromkeys(c.shape_id for c in self._changes
+                                  if c.kind in REDRAW_SHAPE and c.shape_id is not None))
+
+    def affects_shapes(self) -> bool:
+        """True if anything but the timer changed."""
+        return bool(self._kinds - {TIMER_CHANGED})
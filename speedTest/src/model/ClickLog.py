@@ -0,0 +1,170 @@
+import json
+from array import array
+
+
+class ClickLog:
+    """
+    Column store for the clicks of a test.
+    Every column is a typed array that grows by doubling (at least chunk_size
+    slots), so appending a click does not allocate a new object. Target ids
+    are interned to small ints.
+
+    Views returned by column() are zero-copy. Growing allocates new arrays
+    instead of resizing the old ones, so a view stays valid across appends and
+    keeps showing the clicks it was taken of. clear() starts new arrays too, so
+    views, frames and Arrow tables of a finished test are never overwritten.
+    """
+
+    # timestamp: wall clock when the click was registered
+    # event_ns: time.perf_counter_ns() when the input device produced the event
+    fieldnames = ('timestamp', 'event_ns', 'target_id', 'x', 'y', 'shape_hit')
+
+    def __init__(self, chunk_size: int = 4096):
+        self.chunk_size = chunk_size
+        self._size = 0
+        self._capacity = 0
+
+        self._timestamp = array('d')
+        self._event_ns = array('q')
+        self._target = array('i')  # index into self.target_ids
+        self._x = array('i')
+        self._y = array('i')
+        self._hit = array('B')
+
+        # interned target ids
+        self.target_ids: list[str] = []
+        self._target_index: dict[str, int] = {}
+
+    _attrs = {
+        'timestamp': '_timestamp',
+        'event_ns': '_event_ns',
+        'target_id': '_target',
+        'x': '_x',
+        'y': '_y',
+        'shape_hit': '_hit',
+    }
+
+    # printf formats of the columns in json_objects(), repr of a float is what json writes for it
+    _formats = {'timestamp': '%r', 'event_ns': '%d', 'target_id': '%s', 'x': '%d', 'y': '%d', 'shape_hit': '%s'}
+
+    def _columns(self):
+        return {name: getattr(self, attr) for name, attr in self._attrs.items()}
+
+    def _grow(self):
+        """
+        Moves every column into a new array with more zeroed slots. An array cannot be
+        resized while a view exports its buffer, the copy is free of exports.
+        """
+        extra = max(self.chunk_size, self._capacity)
+        for name, col in self._columns().items():
+            grown = array(col.typecode, col)
+            grown.frombytes(bytes(extra * col.itemsize))
+            setattr(self, self._attrs[name], grown)
+        self._capacity += extra
+
+    def _intern(self, target_id: str) -> int:
+        idx = self._target_index.get(target_id)
+        if idx is None:
+            idx = len(self.target_ids)
+            self.target_ids.append(target_id)
+            self._target_index[target_id] = idx
+        return idx
+
+    def append(self, timestamp: float, event_ns: int, target_id: str, x: int, y: int, hit: bool):
+        if self._size == self._capacity:
+            self._grow()
+        i = self._size
+        self._timestamp[i] = timestamp
+        self._event_ns[i] = event_ns
+        self._target[i] = self._intern(target_id)
+        self._x[i] = x
+        self._y[i] = y
+        self._hit[i] = hit
+        self._size = i + 1
+
+    def clear(self):
+        """Forgets all clicks. The old arrays are left to views that may still use them."""
+        for name, col in self._columns().items():
+            setattr(self, self._attrs[name], array(col.typecode))
+        self._size = 0
+        self._capacity = 0
+        self.target_ids = []
+        self._target_index = {}
+
+    def __len__(self):
+        return self._size
+
+    def column(self, name: str) -> memoryview:
+        """Zero-copy view on the filled part of a column. target_id holds the interned ints."""
+        return memoryview(self._columns()[name])[:self._size]
+
+    def columns(self) -> dict[str, memoryview]:
+        return {name: self.column(name) for name in self.fieldnames}
+
+    def to_lists(self) -> dict[str, list]:
+        """
+        Python lists of the filled part of every column, with target ids resolved and
+        shape_hit as bools. Converted a column at a time, for the text exports.
+        """
+        ids = self.target_ids
+        lists = {name: self.column(name).tolist() for name in self.fieldnames}
+        lists['target_id'] = [ids[i] for i in lists['target_id']]
+        lists['shape_hit'] = [bool(hit) for hit in lists['shape_hit']]
+        return lists
+
+    def json_objects(self, indent: int = None):
+        """
+        Yields every click as JSON object text, the same as json.dumps() of its dict
+        (with indent, as json.dump(clicks, indent=indent) writes the objects of the list).
+        Formatted from the columns with one template, without a dict per click.
+        """
+        ids = [json.dumps(target_id) for target_id in self.target_ids] # each id escaped once
+        lists = {name: self.column(name).tolist() for name in self.fieldnames}
+        lists['target_id'] = [ids[i] for i in lists['target_id']]
+        lists['shape_hit'] = ['true' if hit else 'false' for hit in lists['shape_hit']]
+
+        fields = [f'"{name}": {self._formats[name]}' for name in self.fieldnames]
+        if indent is None:
+            template = '{' + ', '.join(fields) + '}'
+        else:
+            inner, outer = '\n' + ' ' * 2 * indent, '\n' + ' ' * indent
+            template = '{' + inner + (',' + inner).join(fields) + outer + '}'
+        return map(template.__mod__, zip(*lists.values()))
+
+    def rows(self):
+        """Yields one tuple per click in the order of fieldnames, with target ids resolved."""
+        return zip(*self.to_lists().values())
+
+    def row(self, i: int) -> tuple:
+        """Returns a single click as tuple in the order of fieldnames."""
+        if not -self._size <= i < self._size:
+            raise IndexError("click index out of range")
+        i %= self._size
+        return (self._timestamp[i], self._event_ns[i], self.target_ids[self._target[i]],
+                self._x[i], self._y[i], bool(self._hit[i]))
+
+    def to_arrow(self):
+        """
+        Returns the clicks as pyarrow Table with typed columns.
+        Numeric columns share memory with the log, later appends and clear()
+        do not change the table. Raises ImportError if pyarrow is not installed.
+        """
+        import pyarrow as pa
+
+        n = self._size
+
+        def view(name, arrow_type):
+            return pa.Array.from_buffers(arrow_type, n, [None, pa.py_buffer(self.column(name))])
+
+        target_id = pa.DictionaryArray.from_arrays(
+            view('target_id', pa.int32()),
+            pa.array(self.target_ids, type=pa.string())
+        )
+        return pa.table({
+            'timestamp': view('timestamp', pa.float64()),
+            'event_ns': view('event_ns', pa.int64()),
+            'target_id': target_id,
+            'x': view('x', pa.int32()),
+            'y': view('y', pa.int32()),
+            'shape_hit': view('shape_hit', pa.uint8()).cast(pa.bool_()), # arrow packs bools into bits
+        })
@@ -0,0 +1,194 @@
+import csv
+import json
+import os
+import queue
+import threading
+import time
+import logging as log
+from datetime import datetime
+from pathlib import Path
+
+from paths import LOG_DIR
+from model.ClickLog import ClickLog
+
+
+class ClickLogWriter:
+    """
+    Streams clicks to disk while a test is running.
+    Clicks are put on a queue and a background thread appends them in batches
+    to a file in LOG_DIR/stream, so the Tk main loop never waits for file I/O.
+    Each session gets its own file, which is rotated after max_rows clicks.
+    """
+
+    def __init__(self, directory: Path = None, fmt: str = "csv", batch_size: int = 256,
+                 flush_interval: float = 0.005, fsync_interval: float = 1.0, max_rows: int = 100_000):
+        if fmt not in ("csv", "ndjson"):
+            raise ValueError(f"Unknown stream format: {fmt}")
+        self.directory = directory if directory is not None else LOG_DIR / "stream"
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval  # seconds the thread waits for more clicks
+        self.fsync_interval = fsync_interval  # seconds between fsyncs
+        self.max_rows = max_rows              # rows per file before rotating
+        self.fieldnames = ClickLog.fieldnames
+
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+
+        # only touched by the writer thread
+        self._file = None
+        self._csv = None
+        self._session = None
+        self._part = 0
+        self._rows = 0
+        self._dirty = False
+        self._last_fsync = 0.0
+
+    # ================== Called from the main thread ==================
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="ClickLogWriter", daemon=True)
+        self._thread.start()
+
+    def begin_session(self, name: str = None):
+        """Opens a new file for the following clicks. An existing file is never overwritten, see _open_file()."""
+        if name is None:
+            name = "clicks_" + datetime.now().strftime("%Y%m%d-%H%M%S-%f")[:-3] # milliseconds
+        self._queue.put(("begin", name))
+
+    def write(self, row: tuple):
+        """Queues one click, given as tuple in the order of ClickLog.fieldnames."""
+        self._queue.put(("row", row))
+
+    def end_session(self, meta: dict = None):
+        """Closes the session file. meta is written to <session>.meta.json, if given."""
+        self._queue.put(("end", meta))
+
+    def close(self, timeout: float = 2.0):
+        """Writes everything still queued, syncs the file and stops the thread."""
+        if self._thread is None:
+            return
+        self._queue.put(("stop", None))
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    # ================== Writer thread ==================
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.fsync_interval)
+            except queue.Empty:
+                self._sync()
+                continue
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                stop = self._handle_batch(batch)
+            except OSError as e:
+                log.error(f"Streaming click log failed, clicks are only kept in memory: {e}")
+                self._close_file()
+                stop = any(kind == "stop" for kind, _ in batch)
+
+            if stop:
+                return
+
+    def _handle_batch(self, batch) -> bool:
+        """Processes a batch of queue items. Returns True if the thread should stop."""
+        for kind, payload in batch:
+            if kind == "row":
+                if self._file is None:
+                    continue  # no session open, clicks stay in memory only
+                if self._rows >= self.max_rows:
+                    self._rotate()
+                self._write_row(payload)
+            elif kind == "begin":
+                self._close_file()
+                self._session = payload
+                self._part = 0
+                self._open_file()
+            elif kind == "end":
+                self._close_file()
+                if payload is not None and self._session is not None:
+                    self._write_meta(payload)
+                self._session = None
+            elif kind == "stop":
+                self._close_file()
+                return True
+
+        if self._file is not None and self._dirty:
+            self._file.flush()  # data is safe from a crash of the app once it is in the OS
+            if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self._sync()
+        return False
+
+    def _write_row(self, row: tuple):
+        if self.fmt == "csv":
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(dict(zip(self.fieldnames, row))) + "\n")
+        self._rows += 1
+        self._dirty = True
+
+    def _open_file(self):
+        """
+        Creates the file of the session (or of the next part). If it exists, e.g. a
+        session restarted within the same millisecond or a given name used twice,
+        the session is renamed to <name>-1, -2, ... so nothing is truncated.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        base, n = self._session, 0
+        while True:
+            suffix = "" if self._part == 0 else f"_{self._part:03d}"
+            path = self.directory / f"{self._session}{suffix}.{self.fmt}"
+            try:
+                self._file = open(path, mode="x", newline="", encoding="utf-8")
+                break
+            except FileExistsError:
+                if self._part:
+                    self._part += 1
+                else:
+                    n += 1
+                    self._session = f"{base}-{n}"
+        self._rows = 0
+        if self.fmt == "csv":
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(self.fieldnames)
+        self._dirty = True
+        log.info(f"Streaming clicks to {path}")
+
+    def _write_meta(self, meta: dict):
+        path = self.directory / f"{self._session}.meta.json"
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(meta, file, indent=4)
+
+    def _rotate(self):
+        self._close_file()
+        self._part += 1
+        self._open_file()
+
+    def _sync(self):
+        if self._file is not None and self._dirty:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._dirty = False
+        self._last_fsync = time.monotonic()
+
+    def _close_file(self):
+        if self._file is None:
+            return
+        try:
+            self._sync()
+        finally:
+            self._file.close()
+            self._file = None
+            self._csv = None
@@ -0,0 +1,344 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import logging as log
+from collections import OrderedDict
+from dataclasses import dataclass, fields, MISSING
+from pathlib import Path
+from typing import Callable
+
+from paths import CACHE_DIR
+from model.shapes import shape_classes
+
+# Bump when the compiled format changes, old sidecar files are ignored then.
+COMPILER_VERSION = 2
+DEFAULT_TIMER = 10
+PROGRESS_STEP = 500 # shapes between two progress callbacks
+
+
+class ConfigError(Exception):
+    """Config file cannot be used"""
+    pass
+
+
+@dataclass(frozen=True)
+class CompiledConfig:
+    """
+    A validated config. shapes holds (type, kwargs) per shape, ready to be
+    passed to the shape class. kwargs must not be changed.
+    """
+    timer_duration: int | float
+    shapes: tuple
+    content_hash: str
+    colors_checked: bool = False
+    warnings: tuple = ()
+
+
+def _schema(cls):
+    """Returns (required fields, defaults) of a shape class."""
+    required = []
+    defaults = {}
+    for f in fields(cls):
+        if f.default is MISSING and f.default_factory is MISSING:
+            required.append(f.name)
+        else:
+            defaults[f.name] = f.default
+    return required, defaults
+
+_schemas = {name: _schema(cls) for name, cls in shape_classes.items()}
+
+
+def _number(value, where: str, positive: bool = False):
+    # bool is a subclass of int, but true / false are no valid coordinates
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ConfigError(f"{where}: expected number, got {type(value).__name__}")
+    if positive and value <= 0:
+        raise ConfigError(f"{where}: must be greater than 0, got {value}")
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return value
+
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[ \t\n\r]*")
+
+
+def _skip(text: str, pos: int) -> int:
+    return _whitespace.match(text, pos).end()
+
+
+def _expect(text: str, pos: int, chars: str, message: str) -> int:
+    """Returns the position after the next non-whitespace char, which must be one of chars."""
+    pos = _skip(text, pos)
+    if text[pos:pos + 1] not in tuple(chars):
+        raise json.JSONDecodeError(message, text, pos)
+    return pos
+
+
+def parse_config(text: str, progress: Callable[[int, int], None] = None) -> dict:
+    """
+    Parses a config like json.loads(), but the 'shapes' list one shape at a time, so
+    a large config does not hold the GIL in a single call.
+    progress(done, total) is called with the parsed characters every PROGRESS_STEP
+    shapes, it may raise to cancel.
+    """
+    pos = _skip(text, 0)
+    if not text.startswith("{", pos):
+        return _decoder.decode(text) # not an object, compile_config() reports it
+
+    config = {}
+    pos = _skip(text, pos + 1)
+    if text.startswith("}", pos):
+        pos += 1
+    else:
+        while True:
+            key, pos = _decoder.raw_decode(text, pos)
+            if not isinstance(key, str):
+                raise json.JSONDecodeError("Expecting property name enclosed in double quotes", text, pos)
+            pos = _skip(text, _expect(text, pos, ":", "Expecting ':' delimiter") + 1)
+            if key == "shapes" and text.startswith("[", pos):
+                config[key], pos = _parse_shapes(text, pos, progress)
+            else:
+                config[key], pos = _decoder.raw_decode(text, pos)
+            pos = _expect(text, pos, ",}", "Expecting ',' delimiter")
+            if text[pos] == "}":
+                pos += 1
+                break
+            pos = _skip(text, pos + 1)
+
+    pos = _skip(text, pos)
+    if pos != len(text):
+        raise json.JSONDecodeError("Extra data", text, pos)
+    return config
+
+
+def _parse_shapes(text: str, pos: int, progress) -> tuple[list, int]:
+    shapes = []
+    pos = _skip(text, pos + 1)
+    if text.startswith("]", pos):
+        return shapes, pos + 1
+    while True:
+        if progress is not None and len(shapes) % PROGRESS_STEP == 0:
+            progress(pos, len(text))
+        shape, pos = _decoder.raw_decode(text, pos)
+        shapes.append(shape)
+        pos = _expect(text, pos, ",]", "Expecting ',' delimiter")
+        if text[pos] == "]":
+            return shapes, pos + 1
+        pos = _skip(text, pos + 1)
+
+
+def compile_config(config: dict, content_hash: str = "",
+                   color_validator: Callable[[str], bool] = None,
+                   progress: Callable[[int, int], None] = None) -> CompiledConfig:
+    """
+    Validates a parsed config and normalizes it. Raises ConfigError for invalid configs.
+    progress(done, total) is called every PROGRESS_STEP shapes, it may raise to cancel.
+    """
+    if not isinstance(config, dict):
+        raise ConfigError("Configuration must be a JSON object")
+    warnings = []
+
+    # timer duration, missing or wrong values fall back to the default
+    duration = config.get("timer_duration")
+    if duration is None:
+        warnings.append(f"Configuration does not include the 'timer_duration' key, assuming default value of {DEFAULT_TIMER}s")
+        duration = DEFAULT_TIMER
+    elif isinstance(duration, bool) or not isinstance(duration, (int, float)):
+        warnings.append(f"Invalid type for 'timer_duration': expected number, got {type(duration).__name__}")
+        duration = DEFAULT_TIMER
+
+    # shapes
+    shapes = config.get("shapes")
+    if shapes is None:
+        raise ConfigError("Configuration does not include the 'shapes' key")
+    if not isinstance(shapes, list):
+        raise ConfigError("'shapes' must be a list")
+    if not shapes:
+        warnings.append("The 'shapes' key exists, but no shapes are defined.")
+
+    compiled = []
+    ids = set()
+    for i, shape_data in enumerate(shapes):
+        if progress is not None and i % PROGRESS_STEP == 0:
+            progress(i, len(shapes))
+        where = f"shape {i}"
+        if not isinstance(shape_data, dict):
+            raise ConfigError(f"{where}: must be an object")
+
+        shape_type = shape_data.get("type")
+        if shape_type not in _schemas:
+            raise ConfigError(f"{where}: unknown shape type {shape_type!r}")
+        required, defaults = _schemas[shape_type]
+
+        kwargs = {k: v for k, v in shape_data.items() if k != "type"}
+        unknown = kwargs.keys() - set(required) - defaults.keys()
+        if unknown:
+            raise ConfigError(f"{where}: unknown keys {sorted(unknown)} for {shape_type}")
+        missing = [k for k in required if k not in kwargs]
+        if missing:
+            raise ConfigError(f"{where}: missing keys {missing}")
+
+        shape_id = kwargs["id"]
+        if not isinstance(shape_id, str) or not shape_id:
+            raise ConfigError(f"{where}: 'id' must be a non-empty string")
+        if shape_id in ids:
+            raise ConfigError(f"{where}: duplicate shape id '{shape_id}'")
+        ids.add(shape_id)
+        where = f"shape '{shape_id}'"
+
+        for key, value in kwargs.items():
+            if key in ("id", "color"):
+                continue
+            kwargs[key] = _number(value, f"{where}.{key}", positive=key not in ("x", "y"))
+
+        color = kwargs.setdefault("color", defaults["color"])
+        if not isinstance(color, str):
+            raise ConfigError(f"{where}: 'color' must be a string")
+        if color == "lightgreen":
+            warnings.append("Using lightgreen for a shape is not recomended, as this is the color used for highlighting")
+
+        compiled.append((shape_type, kwargs))
+
+    result = CompiledConfig(duration, tuple(compiled), content_hash, warnings=tuple(warnings))
+    if color_validator is not None:
+        result = check_colors(result, color_validator)
+    return result
+
+
+def check_colors(config: CompiledConfig, color_validator: Callable[[str], bool]) -> CompiledConfig:
+    """Checks every distinct color once. Raises ConfigError for unknown colors."""
+    colors = {kwargs["color"]: kwargs["id"] for _, kwargs in config.shapes}
+    for color, shape_id in colors.items():
+        if not color_validator(color):
+            raise ConfigError(f"shape '{shape_id}': unknown color {color!r}")
+    return CompiledConfig(config.timer_duration, config.shapes, config.content_hash,
+                          colors_checked=True, warnings=config.warnings)
+
+
+class ConfigCache:
+    """
+    Cache for compiled configs, keyed by the hash of the file content.
+    Keeps the last max_entries configs in memory (LRU) and a JSON sidecar per
+    config in cache_dir, so unchanged files are neither parsed nor validated again.
+    Files whose mtime and size did not change are not even read.
+    Can be used from several threads.
+    """
+
+    def __init__(self, cache_dir: Path = None, max_entries: int = 32):
+        self.cache_dir = cache_dir if cache_dir is not None else CACHE_DIR / "configs"
+        self.max_entries = max_entries
+        self._configs: OrderedDict[str, CompiledConfig] = OrderedDict()
+        self._stats: dict[Path, tuple[int, int, str]] = {} # path -> (mtime_ns, size, hash)
+        self._lock = threading.RLock()
+
+    def load(self, path: Path, color_validator: Callable[[str], bool] = None,
+             progress: Callable[[int, int], None] = None) -> CompiledConfig:
+        """
+        progress(done, total) is called while parsing and compiling, it is not called if
+        the config is cached. Reading and compiling run outside the lock, so a worker
+        compiling a large config does not block a load of another config.
+        """
+        path = Path(path).resolve()
+        st = path.stat()
+        with self._lock:
+            known = self._stats.get(path)
+            config = None
+            if known and known[:2] == (st.st_mtime_ns, st.st_size):
+                config = self._configs.get(known[2])
+
+        if config is None:
+            data = path.read_bytes()
+            content_hash = hashlib.sha256(data).hexdigest()
+            with self._lock:
+                self._stats[path] = (st.st_mtime_ns, st.st_size, content_hash)
+                config = self._configs.get(content_hash)
+            if config is None:
+                config = self._load_sidecar(content_hash) or self._compile(data, content_hash, progress)
+
+        with self._lock:
+            cached = self._configs.get(config.content_hash)
+            if cached is not None and cached.colors_checked: # checked by another thread meanwhile
+                config = cached
+            self._put(config.content_hash, config)
+        if color_validator is not None:
+            config = self.check_colors(config, color_validator)
+        return config
+
+    def check_colors(self, config: CompiledConfig, color_validator: Callable[[str], bool]) -> CompiledConfig:
+        """Checks the colors of a config loaded without color_validator and caches the result."""
+        if config.colors_checked:
+            return config
+        config = check_colors(config, color_validator)
+        with self._lock:
+            self._put(config.content_hash, config)
+        self._store_sidecar(config)
+        return config
+
+    def _compile(self, data: bytes, content_hash: str, progress=None) -> CompiledConfig:
+        """The first half of progress is parsing, the second half validating."""
+        if progress is None:
+            parse_progress = compile_progress = None
+        else:
+            parse_progress = lambda done, total: progress(done, 2 * total)
+            compile_progress = lambda done, total: progress(total + done, 2 * total)
+        try:
+            parsed = parse_config(data.decode(json.detect_encoding(data), "surrogatepass"), parse_progress)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ConfigError(f"not valid JSON: {e}") from e
+        config = compile_config(parsed, content_hash, progress=compile_progress)
+        self._store_sidecar(config)
+        return config
+
+    def _put(self, content_hash: str, config: CompiledConfig):
+        self._configs[content_hash] = config
+        self._configs.move_to_end(content_hash)
+        while len(self._configs) > self.max_entries:
+            self._configs.popitem(last=False)
+
+    def _sidecar(self, content_hash: str) -> Path:
+        return self.cache_dir / f"{content_hash}.v{COMPILER_VERSION}.json"
+
+    def _load_sidecar(self, content_hash: str) -> CompiledConfig | None:
+        """Plain JSON, so a file placed in the cache folder is only data and never runs code."""
+        try:
+            data = json.loads(self._sidecar(content_hash).read_bytes())
+            config = CompiledConfig(
+                timer_duration=data["timer_duration"],
+                shapes=tuple((shape_type, kwargs) for shape_type, kwargs in data["shapes"]),
+                content_hash=data["content_hash"],
+                colors_checked=data["colors_checked"],
+                warnings=tuple(data["warnings"]),
+            )
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.debug(f"Ignoring broken config cache file: {e}")
+            return None
+        return config if config.content_hash == content_hash else None
+
+    def _store_sidecar(self, config: CompiledConfig):
+        """Written to a temp file of its own first, so caches of other threads never see half a file."""
+        path = self._sidecar(config.content_hash)
+        data = {
+            "timer_duration": config.timer_duration,
+            "shapes": config.shapes,
+            "content_hash": config.content_hash,
+            "colors_checked": config.colors_checked,
+            "warnings": config.warnings,
+        }
+        tmp = None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", dir=self.cache_dir, suffix=".tmp",
+                                             delete=False, encoding="utf-8") as file:
+                tmp = file.name
+                json.dump(data, file, separators=(",", ":"))
+            os.replace(tmp, path)
+        except OSError as e:
+            log.debug(f"Could not write config cache file {path}: {e}")
+            if tmp is not None:
+                Path(tmp).unlink(missing_ok=True)
@@ -0,0 +1,249 @@
+import json
+import os
+import queue
+import threading
+import logging as log
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+from paths import CONFIG_DIR, CACHE_DIR
+from model.ConfigCompiler import ConfigCache, ConfigError
+
+
+@dataclass(frozen=True)
+class ConfigInfo:
+    """Index entry of a config file. shape_count is None if the config is invalid."""
+    name: str # path relative to the library root without .json, e.g. "study/block_01"
+    mtime_ns: int
+    size: int
+    content_hash: str = ""
+    shape_count: int = None
+    timer_duration: float = None
+    error: str = None
+
+
+class ConfigLibrary:
+    """
+    Index of all configs in CONFIG_DIR and its subfolders. A background thread
+    keeps it up to date: only folders whose mtime changed are listed again and
+    their configs stat()ed, a config is only read again if its mtime or size
+    changed. Editing a file in place does not change the mtime of its folder, so
+    every FULL_SCAN_EVERY scans all configs are stat()ed. The index is stored in
+    CACHE_DIR, so a restart does not read all configs again.
+    The main loop calls poll() to get changes.
+    """
+    FULL_SCAN_EVERY = 15 # scans, 30 s with the default interval
+
+    def __init__(self, root: Path = None, index_path: Path = None, interval: float = 2.0):
+        self.root = root if root is not None else CONFIG_DIR
+        self.index_path = index_path if index_path is not None else CACHE_DIR / "config_index.json"
+        self.interval = interval # seconds between scans
+
+        self._cache = ConfigCache()
+        self._lock = threading.Lock() # guards _index and _version, only held to read or swap entries
+        self._store_lock = threading.Lock()
+        self._index: dict[str, ConfigInfo] = {}
+        self._folders: dict[str, tuple[int, list[str], list[str]]] = {} # folder -> (mtime_ns, configs, subfolders)
+        self._version = 0
+        self._reported = -1
+        self._scans = 0
+        self._pending = queue.SimpleQueue() # (name, path) given to update_file()
+        self._stop = threading.Event()
+        self._wake = threading.Event() # set to handle _pending before the next interval
+        self._thread = None
+        self._load_index()
+
+    # ================== Main thread ==================
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ConfigLibrary", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=2)
+        self._thread = None
+
+    def entries(self) -> list[ConfigInfo]:
+        """Valid configs, sorted by name."""
+        with self._lock:
+            return sorted((info for info in self._index.values() if info.error is None), key=lambda i: i.name)
+
+    def names(self) -> list[str]:
+        return [info.name for info in self.entries()]
+
+    def get(self, name: str) -> ConfigInfo | None:
+        with self._lock:
+            return self._index.get(name)
+
+    def path_of(self, name: str) -> Path:
+        return self.root / f"{name}.json"
+
+    def poll(self) -> bool:
+        """True if the index changed since the last poll."""
+        version = self._version
+        if version == self._reported:
+            return False
+        self._reported = version
+        return True
+
+    def update_file(self, path: Path) -> str | None:
+        """
+        Indexes a single file soon, e.g. a config that was just saved. The file is
+        compiled by the library thread (at once if it is not running), poll() reports it.
+        Returns its name, None if it is not in the library.
+        """
+        path = Path(path)
+        try:
+            name = path.resolve().relative_to(self.root.resolve()).with_suffix("").as_posix()
+        except ValueError:
+            return None
+        self._pending.put((name, path))
+        if self._thread is None:
+            self._index_pending()
+        else:
+            self._wake.set()
+        return name
+
+    def _index_pending(self):
+        changed = False
+        while True:
+            try:
+                name, path = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            changed |= self._index_file(name, path)
+        if changed:
+            with self._lock:
+                self._version += 1
+            self._store_index()
+
+    # ================== Scanning ==================
+    def scan(self) -> bool:
+        """
+        Brings the index up to date. Returns True if something changed.
+        Configs in unchanged folders are only stat()ed every FULL_SCAN_EVERY scans.
+        """
+        full = self._scans % self.FULL_SCAN_EVERY == 0
+        self._scans += 1
+        seen = set()
+        changed = False
+        folders = {}
+        for folder, listed in self._walk("", folders):
+            for filename in self._folders[folder][1]:
+                name = f"{folder}/{filename[:-5]}" if folder else filename[:-5]
+                seen.add(name)
+                if listed or full or self.get(name) is None:
+                    changed |= self._index_file(name, self.path_of(name))
+        self._folders = folders
+
+        with self._lock:
+            removed = self._index.keys() - seen
+            for name in removed:
+                del self._index[name]
+            if changed or removed:
+                self._version += 1
+        if changed or removed:
+            self._store_index()
+            return True
+        return False
+
+    def _walk(self, folder: str, folders: dict):
+        """
+        Yields (folder, listed) for every folder below root. Only lists a folder
+        again if its mtime changed, then listed is True.
+        """
+        path = self.root / folder if folder else self.root
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return
+        known = self._folders.get(folder)
+        listed = known is None or known[0] != mtime
+        if listed:
+            configs, subfolders = [], []
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.is_dir() and not entry.name.startswith("."):
+                            subfolders.append(f"{folder}/{entry.name}" if folder else entry.name)
+                        elif entry.name.endswith(".json"):
+                            configs.append(entry.name)
+            except OSError as e:
+                log.debug(f"Cannot list config folder {path}: {e}")
+            known = (mtime, configs, subfolders)
+        folders[folder] = known
+        self._folders[folder] = known
+        yield folder, listed
+        for subfolder in known[2]:
+            yield from self._walk(subfolder, folders)
+
+    def _index_file(self, name: str, path: Path) -> bool:
+        """
+        Reads a config if it is new or changed. Returns True if the entry changed.
+        The config is read and compiled without holding the lock, so names() and
+        entries() in the main thread do not wait for a large config.
+        """
+        with self._lock:
+            known = self._index.get(name)
+        try:
+            st = path.stat()
+        except OSError:
+            with self._lock:
+                return self._index.pop(name, None) is not None
+        if known and (known.mtime_ns, known.size) == (st.st_mtime_ns, st.st_size):
+            return False
+
+        try:
+            config = self._cache.load(path) # also fills the sidecar cache, later loads are fast
+            info = ConfigInfo(name, st.st_mtime_ns, st.st_size, config.content_hash,
+                              len(config.shapes), config.timer_duration)
+        except (ConfigError, OSError) as e:
+            if known is None or known.error is None:
+                log.warning(f"Config '{name}' is invalid and not listed: {e}")
+            info = ConfigInfo(name, st.st_mtime_ns, st.st_size, error=str(e))
+        with self._lock:
+            self._index[name] = info
+        return info != known
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._index_pending()
+                self.scan()
+            except Exception as e:
+                log.error(f"Scanning configs failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    # ================== Stored index ==================
+    def _load_index(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as file:
+                stored = json.load(file)
+            if stored.get("root") != str(self.root.resolve()):
+                return
+            self._index = {e["name"]: ConfigInfo(**e) for e in stored["configs"]}
+            self._version += 1
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.debug(f"Ignoring broken config index: {e}")
+
+    def _store_index(self):
+        with self._lock:
+            configs = [asdict(info) for info in self._index.values()]
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.index_path.with_suffix(".tmp")
+            with self._store_lock:
+                with open(tmp, "w", encoding="utf-8") as file:
+                    json.dump({"root": str(self.root.resolve()), "configs": configs}, file)
+                os.replace(tmp, self.index_path)
+        except OSError as e:
+            log.debug(f"Could not write config index {self.index_path}: {e}")
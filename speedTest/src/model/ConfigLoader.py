@@ -0,0 +1,111 @@
+import threading
+import logging as log
+from pathlib import Path
+
+from model.shapes import Shape, shape_classes
+from model.ConfigCompiler import ConfigCache, CompiledConfig, PROGRESS_STEP
+from model.SpatialIndex import SpatialIndex
+
+
+class LoadCancelled(Exception):
+    """Raised in the worker thread when a load was cancelled."""
+    pass
+
+
+class ConfigLoad:
+    """
+    One config load running in a worker thread. The main loop polls done and
+    progress, then hands the result to Model.finish_config_load().
+    Only the worker writes the attributes, the main thread only reads them.
+    """
+
+    def __init__(self, path: Path, cache: ConfigCache):
+        self.path = path
+        self.progress = 0.0 # 0..1
+        self.done = False
+        self.config: CompiledConfig = None
+        self.shapes: list[Shape] = None
+        self.spatial_index: SpatialIndex = None
+        self.error: Exception = None
+
+        self._cache = cache
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ConfigLoad", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        """The worker stops at the next chunk, the result is never used."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def _check(self, done: int, total: int, start: float, end: float):
+        if self._cancelled.is_set():
+            raise LoadCancelled()
+        self.progress = start + (end - start) * done / max(total, 1)
+
+    # ================== Worker thread ==================
+    def _run(self):
+        try:
+            # parse and validate (0..50%), cached configs skip this
+            config = self._cache.load(self.path, progress=lambda done, total: self._check(done, total, 0.0, 0.5))
+            self._check(0, 1, 0.5, 0.5)
+
+            # build shapes in chunks (50..90%)
+            shapes = []
+            total = len(config.shapes)
+            for start in range(0, total, PROGRESS_STEP):
+                self._check(start, total, 0.5, 0.9)
+                shapes.extend(shape_classes[shape_type](**kwargs)
+                              for shape_type, kwargs in config.shapes[start:start + PROGRESS_STEP])
+
+            # index (90..100%)
+            self._check(0, 1, 0.9, 1.0)
+            spatial_index = SpatialIndex()
+            spatial_index.rebuild(shapes)
+
+            self.config = config
+            self.shapes = shapes
+            self.spatial_index = spatial_index
+            self.progress = 1.0
+        except LoadCancelled:
+            log.debug(f"Loading {self.path.name} cancelled.")
+        except Exception as e: # reported by the main thread
+            self.error = e
+        finally:
+            self.done = True
+
+
+class ConfigLoader:
+    """Starts config loads in worker threads. A new load cancels the running one."""
+
+    def __init__(self, cache: ConfigCache):
+        self.cache = cache
+        self.current: ConfigLoad = None
+
+    def start(self, path: Path) -> ConfigLoad:
+        self.cancel()
+        self.current = ConfigLoad(path, self.cache)
+        self.current.start()
+        return self.current
+
+    def cancel(self):
+        if self.current is not None and not self.current.done:
+            self.current.cancel()
+        self.current = None
+
+    def take_finished(self) -> ConfigLoad | None:
+        """Returns the current load once its worker is done and forgets it."""
+        load = self.current
+        if load is None or not load.done:
+            return None
+        self.current = None
+        return load
+
+    def busy(self) -> bool:
+        """True from start() until the result was taken."""
+        return self.current is not None
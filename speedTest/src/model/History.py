@@ -0,0 +1,187 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import sys
+import logging as log
+from collections import deque
+from dataclasses import dataclass, field, fields
+
+if TYPE_CHECKING:
+    from model.Model import Model
+    from model.shapes import Shape
+
+
+_field_names: dict[type, tuple[str, ...]] = {}
+
+def _names(cls) -> tuple[str, ...]:
+    """Dataclass field names of a shape class, cached."""
+    names = _field_names.get(cls)
+    if names is None:
+        names = tuple(f.name for f in fields(cls))
+        _field_names[cls] = names
+    return names
+
+def _values(shape: Shape) -> tuple:
+    return tuple(getattr(shape, name) for name in _names(type(shape)))
+
+
+@dataclass
+class Delta:
+    """Difference between two recorded states. Only changed fields are stored."""
+    changed: list = field(default_factory=list) # (shape_id, field, old, new)
+    added: list = field(default_factory=list)   # (index in new order, cls, values)
+    removed: list = field(default_factory=list) # (index in old order, cls, values)
+    order: tuple = None                         # (old ids, new ids), only if shapes were reordered
+    timer: tuple = None                         # (old, new)
+
+    def __bool__(self):
+        return bool(self.changed or self.added or self.removed or self.order or self.timer)
+
+    def approx_size(self) -> int:
+        """Rough memory footprint in bytes, used for the history budget."""
+        size = sys.getsizeof(self)
+        size += sum(sys.getsizeof(c) + sys.getsizeof(c[2]) + sys.getsizeof(c[3]) for c in self.changed)
+        for _, _, values in self.added + self.removed:
+            size += sys.getsizeof(values) + sum(sys.getsizeof(v) for v in values)
+        if self.order:
+            size += 2 * sys.getsizeof(self.order[0])
+        return size
+
+
+class History:
+    """
+    Undo / redo history that stores deltas instead of copies of all shapes.
+    The last recorded state is kept once (one tuple of field values per shape),
+    unchanged shapes share their tuple between snapshots.
+    Old entries are dropped when max_depth or max_bytes is exceeded.
+    """
+
+    def __init__(self, max_depth: int = 500, max_bytes: int = 16 * 1024 * 1024):
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self.undo_stack: deque[Delta] = deque()
+        self.redo_stack: list[Delta] = []
+        self._bytes = 0
+
+        # last recorded state
+        self._state: dict[str, tuple[type, tuple]] = {}
+        self._order: list[str] = []
+        self._timer = None
+
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack)
+
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
+
+    def reset(self, shapes: list[Shape], timer):
+        """Forget all entries and use the given state as starting point."""
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self._bytes = 0
+        self._state = {s.id: (type(s), _values(s)) for s in shapes}
+        self._order = [s.id for s in shapes]
+        self._timer = timer
+
+    def record(self, shapes: list[Shape], timer) -> bool:
+        """Stores the difference to the last recorded state. Returns False if nothing changed."""
+        delta = Delta()
+        state = {}
+        order = []
+        replaced = set() # same id, but a different shape type
+        for index, shape in enumerate(shapes):
+            cls = type(shape)
+            values = _values(shape)
+            prev = self._state.get(shape.id)
+            if prev is None or prev[0] is not cls:
+                if prev is not None:
+                    delta.removed.append((self._order.index(shape.id), *prev))
+                    replaced.add(shape.id)
+                delta.added.append((index, cls, values))
+            elif prev[1] != values:
+                for name, old, new in zip(_names(cls), prev[1], values):
+                    if old != new:
+                        delta.changed.append((shape.id, name, old, new))
+            else:
+                values = prev[1] # share the unchanged tuple
+            state[shape.id] = (cls, values)
+            order.append(shape.id)
+
+        for index, shape_id in enumerate(self._order):
+            if shape_id not in state:
+                delta.removed.append((index, *self._state[shape_id]))
+        delta.removed.sort(key=lambda r: r[0])
+
+        kept_old = [i for i in self._order if i in state and i not in replaced]
+        kept_new = [i for i in order if i in self._state and i not in replaced]
+        if kept_old != kept_new:
+            delta.order = (list(self._order), order)
+
+        if timer != self._timer:
+            delta.timer = (self._timer, timer)
+
+        self._state = state
+        self._order = order
+        self._timer = timer
+
+        if not delta:
+            return False
+
+        self.undo_stack.append(delta)
+        self._bytes += delta.approx_size()
+        self.redo_stack.clear()
+        self._trim()
+        return True
+
+    def _trim(self):
+        while self.undo_stack and (len(self.undo_stack) > self.max_depth or self._bytes > self.max_bytes):
+            self._bytes -= self.undo_stack.popleft().approx_size()
+        log.debug(f"History: {len(self.undo_stack)} entries, ~{self._bytes} bytes")
+
+    def undo(self, model: Model) -> bool:
+        if not self.undo_stack:
+            return False
+        delta = self.undo_stack.pop()
+        self._bytes -= delta.approx_size()
+        self._apply(model, delta, reverse=True)
+        self.redo_stack.append(delta)
+        return True
+
+    def redo(self, model: Model) -> bool:
+        if not self.redo_stack:
+            return False
+        delta = self.redo_stack.pop()
+        self._apply(model, delta, reverse=False)
+        self.undo_stack.append(delta)
+        self._bytes += delta.approx_size()
+        return True
+
+    def _apply(self, model: Model, delta: Delta, reverse: bool):
+        """Applies a delta to the shapes of the model in place (or its inverse)."""
+        remove, insert = (delta.added, delta.removed) if reverse else (delta.removed, delta.added)
+        by_id = {s.id: s for s in model.shapes}
+
+        for _, cls, values in remove:
+            shape_id = values[_names(cls).index("id")]
+            by_id.pop(shape_id, None)
+        shapes = [s for s in model.shapes if s.id in by_id]
+
+        for index, cls, values in sorted(insert, key=lambda r: r[0]):
+            shape = cls(**dict(zip(_names(cls), values)))
+            shapes.insert(index, shape)
+            by_id[shape.id] = shape
+
+        for shape_id, name, old, new in delta.changed:
+            setattr(by_id[shape_id], name, old if reverse else new)
+
+        if delta.order:
+            ids = delta.order[0] if reverse else delta.order[1]
+            shapes = [by_id[i] for i in ids]
+
+        if delta.timer:
+            model.timer_duration = delta.timer[0] if reverse else delta.timer[1]
+
+        model.shapes[:] = shapes
+        self._state = {s.id: (type(s), _values(s)) for s in shapes}
+        self._order = [s.id for s in shapes]
+        self._timer = model.timer_duration
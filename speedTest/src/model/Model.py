@@ -1,54 +1,181 @@
 import json
 import csv
+import gzip
+import itertools
+import math
 import time
 import logging as log
-import copy
+from contextlib import contextmanager
 from pathlib import Path
 
 from paths import CONFIG_DIR, LOG_DIR
 from model.shapes import *
 from model.ConfigVisitor import ConfigVisitor
+from model.ClickLog import ClickLog
+from model.ClickLogWriter import ClickLogWriter
+from model.History import History
+from model.ConfigCompiler import ConfigCache, ConfigError
+from model.ConfigLibrary import ConfigLibrary
+from model.ConfigLoader import ConfigLoader, ConfigLoad
+from model.SpatialIndex import SpatialIndex
+from model.LatencyTracer import LatencyTracer
+from model.ChangeSet import *
+from model.TargetSchedule import TargetSchedule, ROUND_ROBIN, strategies as target_strategies
+
+# Targets scheduled ahead per second of the timer, the schedule is extended if a participant is faster
+TARGETS_PER_SECOND = 5
 
 class Model:
     def __init__(self):
         self.observers = []
 
         self.timer_duration = 0
-        self.undo_stack = []
-        self.redo_stack = []
+        self.config_cache = ConfigCache()
+        self.config_library = ConfigLibrary() # index of CONFIG_DIR, kept up to date once started
+        self.config_loader = ConfigLoader(self.config_cache) # loads configs in a worker thread
+        self.color_validator = None # set by the view, checks colors when a config is loaded
+        self.history = History(max_depth=500, max_bytes=16 * 1024 * 1024)
 
         self.shapes: list[Shape] = []
+        self.shapes_by_id: dict[str, Shape] = {} # kept in sync with self.shapes
+        self.spatial_index = SpatialIndex() # kept in sync with self.shapes
+        self._next_ids: dict[str, int] = {} # prefix -> lowest number that may be free
         
         self.shape_active: Shape = None
-        self.click_log: list[dict] = []
+        self.target_order = ROUND_ROBIN # strategy of the TargetSchedule, see model/TargetSchedule.py
+        self.target_seed: int = None # None = new random seed every session, stored in the session meta
+        self.target_schedule: TargetSchedule = None
+        self.click_log = ClickLog()
+        self.log_writer: ClickLogWriter = None # streams clicks to disk while running, if enabled
+        self.latency_tracer: LatencyTracer = None # input-to-pixel latency per device, if enabled
+        self.session_timing: dict = None # start, end and tick jitter of the last test
+
+        # Observers get the collected changes once per idle cycle of the scheduler.
+        # Without a scheduler (scripts, benchmarks) they are delivered at once.
+        self.scheduler = None # late init in main.py
+        self._changes = ChangeSet()
+        self._delivery_job = None
+        self._batch_depth = 0
+        self._snapshot_pending = False
+
+
+
+    def prepare_targets(self):
+        """Computes the order of the targets for the next session. Called before the timer starts."""
+        if not self.shapes:
+            self.target_schedule = None
+            return
+        length = math.ceil(self.timer_duration * TARGETS_PER_SECOND)
+        self.target_schedule = TargetSchedule(self.shapes, self.target_order, self.target_seed, length)
+        log.info(f"Targets ordered by {self.target_order} (seed {self.target_schedule.seed}).")
 
 
+    def set_target_order(self, order: str, seed: int = None):
+        if order not in target_strategies:
+            raise ValueError(f"Unknown target order: {order}")
+        self.target_order = order
+        self.target_seed = seed
+        log.info(f"Target order set to {order}.")
+
 
     def next_shape(self):
-        """Activates the next shape in the list (or first shape if no shape is active)."""
+        """Activates the next target of the schedule. Without a schedule one is prepared first."""
         if not self.shapes:
             return None
 
-        if self.shape_active not in self.shapes:
-            self.shape_active = self.shapes[0]
-        else:
-            idx = self.shapes.index(self.shape_active)
-            self.shape_active = self.shapes[(idx + 1) % len(self.shapes)]
-        self.notify()
+        if self.target_schedule is None:
+            self.prepare_targets()
+        previous = self.shape_active
+        self.shape_active = self.target_schedule.next()
+        self._notify_active(previous)
 
 
-    def register_click(self, hit: bool, x, y):
-        """Registers a click for later export."""
+    def register_click(self, hit: bool, x, y, t_ns: int=None):
+        """
+        Registers a click for later export.
+        t_ns is the perf_counter_ns() timestamp taken by the input device, if known.
+        """
         timestamp = time.time()
+        if t_ns is None:
+            t_ns = time.perf_counter_ns()
         shape_id = self.shape_active.id
-        entry = {
-            'timestamp': timestamp,
-            'target_id': shape_id,
-            'x': x,
-            'y': y,
-            'shape_hit': hit
-        }
-        self.click_log.append(entry)
+        self.click_log.append(timestamp, t_ns, shape_id, x, y, hit)
+        if self.log_writer:
+            self.log_writer.write((timestamp, t_ns, shape_id, x, y, hit))
+
+
+    def begin_session(self):
+        """Called when a test starts. Clears the log and the latency histograms and opens a new stream file."""
+        self.clear_log()
+        self.session_timing = None
+        if self.latency_tracer:
+            self.latency_tracer.reset()
+        if self.log_writer:
+            self.log_writer.begin_session()
+
+
+    def end_session(self, timing: dict = None):
+        """Called when a test ends. timing is SessionTimer.to_dict() (start, end, tick jitter)."""
+        self.session_timing = timing
+        if self.latency_tracer:
+            for device, kinds in self.latency_tracer.summary().items():
+                for kind, stages in kinds.items():
+                    frame = stages.get("frame", {})
+                    if frame.get("count"):
+                        log.info(f"Latency {device} {kind} (event -> frame): p50 {frame['p50_ms']} ms, "
+                                 f"p95 {frame['p95_ms']} ms, p99 {frame['p99_ms']} ms")
+        if self.log_writer:
+            self.log_writer.end_session(self.session_meta())
+
+
+    def session_meta(self) -> dict:
+        """Information about the session that is stored next to the click log."""
+        meta = {"clicks": len(self.click_log)}
+        if self.session_timing:
+            meta["timer"] = self.session_timing
+        if self.target_schedule:
+            meta["targets"] = self.target_schedule.to_dict()
+        if self.latency_tracer:
+            meta["latency"] = self.latency_tracer.to_dict()
+        return meta
+
+
+    def _export_session_meta(self, path: Path):
+        """Writes session_meta() to <name>.meta.json next to an exported click log, e.g. p1.run1.meta.json for p1.run1.csv."""
+        name = path.with_suffix("")
+        if path.suffix in (".gz", ".zst"): # click_log.ndjson.gz
+            name = name.with_suffix("")
+        meta_path = name.with_name(name.name + ".meta.json")
+        with meta_path.open("w") as file:
+            json.dump(self.session_meta(), file, indent=4)
+
+
+    def set_log_streaming(self, enabled: bool):
+        """Starts or stops the background writer that streams clicks to LOG_DIR."""
+        if enabled and self.log_writer is None:
+            self.log_writer = ClickLogWriter()
+            self.log_writer.start()
+            log.info("Click streaming enabled.")
+        elif not enabled and self.log_writer is not None:
+            self.log_writer.close()
+            self.log_writer = None
+            log.info("Click streaming disabled.")
+
+
+    def set_latency_tracing(self, enabled: bool):
+        """Starts or stops measuring the latency from input events to the screen."""
+        if enabled and self.latency_tracer is None:
+            self.latency_tracer = LatencyTracer()
+            log.info("Latency tracing enabled.")
+        elif not enabled and self.latency_tracer is not None:
+            self.latency_tracer = None
+            log.info("Latency tracing disabled.")
+
+
+    def shutdown(self):
+        """Flushes everything that is still on its way to disk."""
+        self.config_library.stop()
+        self.set_log_streaming(False)
 
 
     def export_click_log_json(self, path: Path=None):
@@ -56,8 +183,14 @@ class Model:
             path = LOG_DIR / "click_log.json"
         path.parent.mkdir(parents=True, exist_ok=True)
 
+        # same text as json.dump(clicks, file, indent=4), written from the columns
         with path.open("w") as file:
-            json.dump(self.click_log, file, indent=4)
+            separator = "[\n    "
+            for text in self.click_log.json_objects(indent=4):
+                file.write(separator + text)
+                separator = ",\n    "
+            file.write("\n]" if len(self.click_log) else "[]")
+        self._export_session_meta(path)
         log.info(f"Click log exported to {path}")
 
     
@@ -67,22 +200,75 @@ class Model:
             path = LOG_DIR / "click_log.csv"
         path.parent.mkdir(parents=True, exist_ok=True)
 
-        # csv columns
-        fieldnames = ['timestamp', 'target_id', 'x', 'y', 'shape_hit']
-
         with open(path, mode='w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-
-            for click in self.click_log:
-                row = {
-                    'timestamp': click['timestamp'],
-                    'target_id': click['target_id'],
-                    'x': click['x'],
-                    'y': click['y'],
-                    'shape_hit': click['shape_hit']
-                }
-                writer.writerow(row)
+            writer = csv.writer(csvfile)
+            columns = self.click_log.to_lists()
+            writer.writerow(columns)
+            writer.writerows(zip(*columns.values()))
+        self._export_session_meta(path)
+        log.info(f'Click log exported to {path}')
+
+
+    def export_click_log_parquet(self, path: Path=None, compression: str="zstd"):
+        """Exports the click log as Parquet file with typed columns. Needs pyarrow."""
+        import pyarrow.parquet as pq
+
+        if path is None:
+            path = LOG_DIR / "click_log.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        pq.write_table(self.click_log.to_arrow(), path, compression=compression or "none")
+        self._export_session_meta(path)
+        log.info(f'Click log exported to {path}')
+
+
+    def export_click_log_arrow(self, path: Path=None, compression: str=None):
+        """
+        Exports the click log as Arrow IPC file. Needs pyarrow.
+        Only uncompressed files can be memory-mapped when reading.
+        """
+        import pyarrow as pa
+
+        if path is None:
+            path = LOG_DIR / "click_log.arrow"
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        if compression not in (None, "zstd", "lz4"):
+            log.warning(f"Arrow IPC does not support {compression} compression, writing uncompressed.")
+            compression = None
+
+        table = self.click_log.to_arrow()
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        with pa.OSFile(str(path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                writer.write_table(table)
+        self._export_session_meta(path)
+        log.info(f'Click log exported to {path}')
+
+
+    def export_click_log_ndjson(self, path: Path=None, compression: str="gzip"):
+        """
+        Exports the click log as newline delimited JSON, optionally gzip or zstd compressed.
+        zstd is written with pyarrow, which is needed for the other binary exports anyway.
+        """
+        if path is None:
+            path = LOG_DIR / "click_log.ndjson"
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        lines = (text + "\n" for text in self.click_log.json_objects())
+
+        if compression == "gzip":
+            with gzip.open(path, "wt", encoding="utf-8") as file:
+                file.writelines(lines)
+        elif compression == "zstd":
+            import pyarrow as pa
+            with pa.CompressedOutputStream(str(path), "zstd") as stream:
+                while chunk := "".join(itertools.islice(lines, 10_000)):
+                    stream.write(chunk.encode("utf-8"))
+        else:
+            with path.open("w", encoding="utf-8") as file:
+                file.writelines(lines)
+        self._export_session_meta(path)
         log.info(f'Click log exported to {path}')
 
 
@@ -110,73 +296,164 @@ class Model:
 
 
     def set_no_active_shape(self):
+        previous = self.shape_active
         self.shape_active = None
-        self.notify()
+        self._notify_active(previous)
+
+    def _notify_active(self, previous: Shape):
+        if previous is self.shape_active:
+            return
+        self.notify(*(Change(ACTIVE_CHANGED, shape.id) for shape in (previous, self.shape_active) if shape is not None))
     
     def clear_log(self):
-        self.click_log = []
+        self.click_log.clear()
 
     def set_observer(self, observer):
         self.observers.append(observer)
 
-    def notify(self):
-        """Used to notify observers when something about the shapes changed."""
-        for obs in self.observers:
-            obs.update()
+    def notify(self, *changes: Change):
+        """
+        Records what changed, see model/ChangeSet.py. Without changes all shapes count as changed.
+        The observers get everything collected in one update() once the main loop is idle.
+        """
+        if not changes:
+            changes = (Change(SHAPES_REPLACED),)
+        for change in changes:
+            self._changes.add(change)
+        self._schedule_delivery()
 
     def notify_timer(self):
         """used to notify observers when timer duration changed"""
-        for obs in self.observers:
-            log.debug(f"observer {obs} update_timer() called.")
-            obs.update_timer()
+        self.notify(Change(TIMER_CHANGED))
 
     def notify_all(self):
-        self.notify()
-        self.notify_timer()
+        self.notify(Change(SHAPES_REPLACED), Change(TIMER_CHANGED), Change(HISTORY_CHANGED))
 
-
-
-    def load_config(self, config_path: Path):
-        if not config_path.exists():
-            log.warning(f"file {config_path.name} does not exist in {config_path.parent}. Use 'Config -> Load Config' to search your file system.")
+    def _schedule_delivery(self):
+        if self._batch_depth or self._delivery_job is not None or not self._changes:
             return
-        
-        with open(config_path) as file:
-            config = json.load(file)
-
-        # load duration
-        duration = config.get("timer_duration")
-        if duration is None:
-            log.warning("Configuration does not include the 'timer_duration' key, assuming default value of 10s")
-            self.timer_duration = 10
-
-        elif not isinstance(duration, (int, float)):
-            log.error(f"Invalid type for 'timer_duration': expected number, got {type(duration).__name__}")
-            self.timer_duration = 10
-
+        if self.scheduler is None:
+            self.deliver()
         else:
-            self.timer_duration = duration
-
-        # load shapes
-        shapes = config.get('shapes', None)
-        if shapes is None:
-            log.error("Configuration does not include the 'shapes' key, keeping previous config.")
-            return 
-        elif not shapes:
-            log.warning("The 'shapes' key exists, but no shapes are defined.")
+            self._delivery_job = self.scheduler.after_idle(self.deliver)
+
+    def deliver(self):
+        """Hands the collected changes to the observers. Can be called to draw at once."""
+        self._delivery_job = None
+        changes, self._changes = self._changes, ChangeSet()
+        if changes.affects_shapes():
+            for obs in self.observers:
+                obs.update(changes)
+        if TIMER_CHANGED in changes:
+            for obs in self.observers:
+                log.debug(f"observer {obs} update_timer() called.")
+                obs.update_timer()
+
+
+    # ==== Batches ====
+    @contextmanager
+    def batch(self):
+        """
+        Groups changes, e.g. adding many shapes. The undo snapshot is taken and
+        the changes are handed to the observers once the outermost batch ends:
+
+            with model.batch():
+                for values in shapes:
+                    model.add_shape(values.pop("type"), **values)
+                model.snapshot()
+
+        Changes made before an exception are kept, like without a batch.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._end_batch()
+
+    def _end_batch(self):
+        if self._snapshot_pending:
+            self._snapshot_pending = False
+            self.snapshot()
+        self._schedule_delivery()
+
+
+
+    def load_config(self, config_path: Path) -> bool:
+        """Loads a config file at once. Returns False if it does not exist or is invalid."""
+        if not self._config_exists(config_path):
+            return False
+
+        # parsed and validated once, then served from the cache
+        try:
+            config = self.config_cache.load(config_path, self.color_validator)
+        except ConfigError as e:
+            log.error(f"Configuration '{config_path.stem}' is invalid, keeping previous config: {e}")
+            return False
+
+        shapes = [shape_classes[shape_type](**kwargs) for shape_type, kwargs in config.shapes]
+        spatial_index = SpatialIndex()
+        spatial_index.rebuild(shapes)
+        self._apply_config(config_path, config, shapes, spatial_index)
+        return True
+
+
+    def start_config_load(self, config_path: Path) -> ConfigLoad | None:
+        """
+        Loads a config in a worker thread, cancelling a load that is still running.
+        Call finish_config_load() from the main loop once the returned load is done.
+        """
+        if not self._config_exists(config_path):
+            return None
+        return self.config_loader.start(config_path)
+
+
+    def finish_config_load(self, load: ConfigLoad) -> bool:
+        """Applies the result of a finished load. Returns False if it failed."""
+        config_path = load.path
+        if load.error is not None:
+            if isinstance(load.error, ConfigError):
+                log.error(f"Configuration '{config_path.stem}' is invalid, keeping previous config: {load.error}")
+            else:
+                log.error(f"Loading configuration '{config_path.stem}' failed, keeping previous config: {load.error}")
+            return False
+        if load.config is None: # cancelled
+            return False
+
+        # colors need Tk, so they are checked here and not in the worker
+        config = load.config
+        if self.color_validator is not None:
+            try:
+                config = self.config_cache.check_colors(config, self.color_validator)
+            except ConfigError as e:
+                log.error(f"Configuration '{config_path.stem}' is invalid, keeping previous config: {e}")
+                return False
+
+        self._apply_config(config_path, config, load.shapes, load.spatial_index)
+        return True
+
+
+    def _config_exists(self, config_path: Path) -> bool:
+        if not config_path.exists():
+            log.warning(f"file {config_path.name} does not exist in {config_path.parent}. Use 'Config -> Load Config' to search your file system.")
+            return False
+        return True
 
-        self.shapes = [] #clear previous config
 
-        for shape_data in config['shapes']:     
-            if shape_data['color'] == 'lightgreen':
-                log.warning('Using lightgreen for a shape is not recomended, as this is the color used for highlighting')
+    def _apply_config(self, config_path: Path, config, shapes: list[Shape], spatial_index: SpatialIndex):
+        """Replaces the current config in one step, so the view redraws once."""
+        for warning in config.warnings:
+            log.warning(warning)
 
-            shape_type = shape_data.pop("type")
-            self.add_shape(shape_type, **shape_data)
+        with self.batch():
+            self.timer_duration = config.timer_duration
+            self.shapes = shapes
+            self.spatial_index = spatial_index
+            self._index_ids()
 
-        self.notify_timer()
-        self.clear_undo_redo()
-        self.snapshot() # snapshot of initial state
+            self.clear_undo_redo() # current state is the initial snapshot
+            self.notify_all()
         log.info(f"Configuration '{config_path.stem}' loaded.")
 
 
@@ -188,18 +465,70 @@ class Model:
         if not shape_id:
             raise MissingIDError("Shape ID must be provided")
 
-        if any(s.id == shape_id for s in self.shapes):
+        if shape_id in self.shapes_by_id:
             raise DuplicateIDError(f"Duplicate shape id '{shape_id}'")
 
         cls = shape_classes[shape_type]
         shape = cls(**kwargs)
         self.shapes.append(shape)
-        self.notify()
+        self.shapes_by_id[shape_id] = shape
+        self.spatial_index.insert(shape)
+        self.notify(Change(SHAPE_ADDED, shape_id))
         return shape
 
+    def add_shapes(self, shapes: list[tuple[str, dict]]) -> list[Shape]:
+        """
+        Adds (shape_type, kwargs) pairs in one batch. Stops at the first invalid
+        shape, the shapes before it stay added.
+        """
+        with self.batch():
+            return [self.add_shape(shape_type, **kwargs) for shape_type, kwargs in shapes]
+
     def delete_shape(self, shape: Shape):
         self.shapes.remove(shape)
-        self.notify()
+        del self.shapes_by_id[shape.id]
+        self.spatial_index.remove(shape)
+        self.notify(Change(SHAPE_REMOVED, shape.id))
+
+    def delete_shapes(self, shapes: list[Shape]):
+        """Deletes many shapes with one pass over the list."""
+        ids = {shape.id for shape in shapes}
+        if not ids:
+            return
+        with self.batch():
+            for shape_id in ids:
+                self.spatial_index.remove(self.shapes_by_id.pop(shape_id))
+            self.shapes[:] = [s for s in self.shapes if s.id not in ids]
+            self.notify(*(Change(SHAPE_REMOVED, shape_id) for shape_id in ids))
+
+    def get_shape(self, shape_id: str) -> Shape | None:
+        return self.shapes_by_id.get(shape_id)
+
+    def next_free_id(self, prefix: str) -> str:
+        """Lowest unused id of the form <prefix><n>, e.g. "s4". Does not reserve it."""
+        n = self._next_ids.get(prefix, 1)
+        while f"{prefix}{n}" in self.shapes_by_id:
+            n += 1
+        self._next_ids[prefix] = n
+        return f"{prefix}{n}"
+
+    def _index_ids(self):
+        """Rebuilds shapes_by_id after self.shapes was replaced."""
+        self.shapes_by_id = {s.id: s for s in self.shapes}
+        self._next_ids.clear()
+
+    def shape_changed(self, shape: Shape):
+        """Call after attributes of a shape were changed directly."""
+        moved = self.spatial_index.update(shape)
+        self.notify(Change(SHAPE_MOVED if moved else SHAPE_RESTYLED, shape.id))
+
+    def shapes_at(self, x, y) -> list[Shape]:
+        """Shapes whose bounding box contains (x, y), topmost first."""
+        return self.spatial_index.at(x, y)
+
+    def shapes_in_rect(self, x0, y0, x1, y1) -> list[Shape]:
+        """Shapes whose bounding box overlaps the rectangle, in draw order."""
+        return self.spatial_index.in_rect(x0, y0, x1, y1)
 
     def set_timer_duration(self, duration):
         if isinstance(duration, (int, float)):
@@ -210,22 +539,24 @@ class Model:
             raise ValueError()
         
 
-    # Memento would be overkill, so funcionality for undo / redo is here.
+    # Undo / redo stores only what changed since the last snapshot, see History.
     def snapshot(self):
-        snapshot = {"shapes": copy.deepcopy(self.shapes), "timer": self.timer_duration}
-        log.debug(f"Snapshot")
-        self.undo_stack.append(snapshot)
-        self.redo_stack.clear()
-        self.notify_all() # notify to update undo / redo button correctly
+        """
+        Records the current state after a change. Nothing is stored if nothing changed.
+        Inside a batch the snapshot is taken when the batch ends.
+        """
+        if self._batch_depth:
+            self._snapshot_pending = True
+            return
+        if self.history.record(self.shapes, self.timer_duration):
+            log.debug(f"Snapshot")
+            self.notify(Change(HISTORY_CHANGED)) # to update undo / redo button correctly
 
 
     def undo(self):
-        if len(self.undo_stack) > 1:
-            self.redo_stack.append(self.undo_stack.pop()) # current state to redo
-            state = self.undo_stack[-1] # get last state, but dont pop
-
-            self.shapes = copy.deepcopy(state["shapes"])
-            self.timer_duration = state["timer"]
+        if self.history.undo(self):
+            self.spatial_index.rebuild(self.shapes)
+            self._index_ids()
             self.notify_all()
             log.debug("Undo.")
         else:
@@ -233,21 +564,25 @@ class Model:
 
 
     def redo(self):
-        if self.redo_stack:
-            state = self.redo_stack.pop()
-            self.undo_stack.append(state) # back on undo
-
-            self.shapes = copy.deepcopy(state["shapes"])
-            self.timer_duration = state["timer"]
+        if self.history.redo(self):
+            self.spatial_index.rebuild(self.shapes)
+            self._index_ids()
             self.notify_all()
             log.debug("Redo.")
         else:
             log.info("Nothing to redo.")
 
 
+    def can_undo(self) -> bool:
+        return self.history.can_undo()
+
+    def can_redo(self) -> bool:
+        return self.history.can_redo()
+
+
     def clear_undo_redo(self):
-        self.undo_stack.clear()
-        self.redo_stack.clear()
+        """Forgets the history, the current state becomes the first snapshot."""
+        self.history.reset(self.shapes, self.timer_duration)
 
 
             
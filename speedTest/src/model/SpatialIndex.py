@@ -0,0 +1,122 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from model.BoundsVisitor import BoundsVisitor
+
+if TYPE_CHECKING:
+    from model.shapes import Shape
+
+
+class SpatialIndex:
+    """
+    Uniform grid over the bounding boxes of the shapes.
+    Every shape is registered in all cells its bounding box touches, so a point
+    query only looks at the shapes of one cell.
+    Each shape also gets a z value (draw order), later shapes are drawn on top.
+    """
+
+    def __init__(self, cell_size: int = 64):
+        self.cell_size = cell_size
+        self._cells: dict[tuple[int, int], set[str]] = {}
+        self._bounds: dict[str, tuple] = {}
+        self._shapes: dict[str, Shape] = {}
+        self._z: dict[str, int] = {}
+        self._next_z = 0
+        self._visitor = BoundsVisitor()
+
+    def rebuild(self, shapes: list[Shape]):
+        """Index all shapes again, list order is the draw order."""
+        self._cells.clear()
+        self._bounds.clear()
+        self._shapes.clear()
+        self._z.clear()
+        self._next_z = 0
+        for shape in shapes:
+            self.insert(shape)
+
+    def _cell_range(self, bounds):
+        cs = self.cell_size
+        x0, y0, x1, y1 = bounds
+        return int(x0 // cs), int(y0 // cs), int(x1 // cs), int(y1 // cs)
+
+    def insert(self, shape: Shape):
+        """Adds a shape on top of all others."""
+        self._z[shape.id] = self._next_z
+        self._next_z += 1
+        self._shapes[shape.id] = shape
+        self._add_to_cells(shape)
+
+    def remove(self, shape: Shape):
+        bounds = self._bounds.pop(shape.id, None)
+        if bounds is None:
+            return
+        cx0, cy0, cx1, cy1 = self._cell_range(bounds)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = self._cells.get((cx, cy))
+                if cell is not None:
+                    cell.discard(shape.id)
+                    if not cell:
+                        del self._cells[(cx, cy)]
+        del self._shapes[shape.id]
+        del self._z[shape.id]
+
+    def update(self, shape: Shape) -> bool:
+        """Call after the geometry of a shape changed. Keeps its z value. Returns False if the bounds are the same."""
+        if shape.id not in self._shapes:
+            self.insert(shape)
+            return True
+        shape.accept(self._visitor)
+        if self._visitor.result == self._bounds[shape.id]:
+            return False
+        z = self._z[shape.id]
+        self.remove(shape)
+        self._z[shape.id] = z
+        self._shapes[shape.id] = shape
+        self._add_to_cells(shape)
+        return True
+
+    def _add_to_cells(self, shape: Shape):
+        shape.accept(self._visitor)
+        bounds = self._visitor.result
+        self._bounds[shape.id] = bounds
+        cx0, cy0, cx1, cy1 = self._cell_range(bounds)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self._cells.setdefault((cx, cy), set()).add(shape.id)
+
+    def at(self, x: float, y: float) -> list[Shape]:
+        """Shapes whose bounding box contains (x, y), topmost first."""
+        cs = self.cell_size
+        cell = self._cells.get((int(x // cs), int(y // cs)))
+        if not cell:
+            return []
+        hits = []
+        for shape_id in cell:
+            x0, y0, x1, y1 = self._bounds[shape_id]
+            if x0 <= x <= x1 and y0 <= y <= y1:
+                hits.append(shape_id)
+        hits.sort(key=self._z.__getitem__, reverse=True)
+        return [self._shapes[i] for i in hits]
+
+    def in_rect(self, x0: float, y0: float, x1: float, y1: float) -> list[Shape]:
+        """Shapes whose bounding box overlaps the rectangle, in draw order."""
+        cx0, cy0, cx1, cy1 = self._cell_range((min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)))
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            candidates = self._bounds.keys() # large rectangle, cheaper to check every shape
+        else:
+            candidates = set()
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    candidates.update(self._cells.get((cx, cy), ()))
+
+        hits = []
+        for shape_id in candidates:
+            bx0, by0, bx1, by1 = self._bounds[shape_id]
+            if bx0 <= x1 and x0 <= bx1 and by0 <= y1 and y0 <= by1:
+                hits.append(shape_id)
+        hits.sort(key=self._z.__getitem__)
+        return [self._shapes[i] for i in hits]
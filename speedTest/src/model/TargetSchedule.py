@@ -0,0 +1,169 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable
+
+import math
+import random
+import statistics
+
+from model.BoundsVisitor import BoundsVisitor
+
+if TYPE_CHECKING:
+    from model.shapes import Shape
+
+ROUND_ROBIN = "round_robin"
+RANDOM = "random"
+FITTS = "fitts"
+
+FITTS_CANDIDATES = 16 # targets compared per step of the Fitts order
+FITTS_SAMPLE_PAIRS = 256 # movements used to estimate the mean index of difficulty
+
+
+class TargetSchedule:
+    """
+    Order in which the targets of a session are activated. The whole sequence
+    is computed before the session starts, next() only moves a cursor.
+    If a participant is faster than expected, the sequence is extended with
+    the same strategy (doubling, so still O(1) per target on average).
+
+    Strategies are functions (schedule, count, previous index) -> list of shape
+    indices, registered in `strategies`. The seed is drawn at random if none is
+    given, so every session can be reproduced from its meta data.
+    """
+
+    def __init__(self, shapes: list[Shape], strategy: str = ROUND_ROBIN, seed: int = None, length: int = None):
+        if not shapes:
+            raise ValueError("Cannot schedule targets without shapes")
+        if strategy not in strategies:
+            raise ValueError(f"Unknown target order: {strategy}")
+        self.shapes = list(shapes)
+        self.strategy = strategy
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2**32)
+        self.rng = random.Random(self.seed)
+        self.sequence: list[int] = [] # indices into shapes
+        self.cursor = 0
+        self._geometry = None
+        self._extend(length or len(self.shapes))
+
+    def next(self) -> Shape:
+        if self.cursor == len(self.sequence):
+            self._extend(len(self.sequence))
+        shape = self.shapes[self.sequence[self.cursor]]
+        self.cursor += 1
+        return shape
+
+    def used(self) -> list[str]:
+        """Ids of the targets activated so far."""
+        return [self.shapes[i].id for i in self.sequence[:self.cursor]]
+
+    def _extend(self, count: int):
+        previous = self.sequence[-1] if self.sequence else None
+        self.sequence.extend(strategies[self.strategy](self, count, previous))
+
+    # ================== Geometry ==================
+    def geometry(self) -> list[tuple[float, float, float]]:
+        """(center x, center y, width) of every shape, width is the smaller side of its bounding box."""
+        if self._geometry is None:
+            visitor = BoundsVisitor()
+            self._geometry = []
+            for shape in self.shapes:
+                shape.accept(visitor)
+                x0, y0, x1, y1 = visitor.result
+                self._geometry.append(((x0 + x1) / 2, (y0 + y1) / 2, max(min(x1 - x0, y1 - y0), 1)))
+        return self._geometry
+
+    def index_of_difficulty(self, source: int, target: int) -> float:
+        """Fitts' index of difficulty (Shannon form) of moving from one shape to another, in bits."""
+        geometry = self.geometry()
+        sx, sy, _ = geometry[source]
+        tx, ty, width = geometry[target]
+        return math.log2(math.hypot(tx - sx, ty - sy) / width + 1)
+
+    def to_dict(self) -> dict:
+        """Stored in the session meta data."""
+        ids = [self.index_of_difficulty(a, b) for a, b in zip(self.sequence[:self.cursor - 1], self.sequence[1:self.cursor])]
+        return {
+            "strategy": self.strategy,
+            "seed": self.seed,
+            "targets": self.used(),
+            "index_of_difficulty": {
+                "mean": round(statistics.fmean(ids), 3) if ids else None,
+                "stdev": round(statistics.pstdev(ids), 3) if ids else None,
+            },
+        }
+
+
+# ================== Strategies ==================
+def round_robin(schedule: TargetSchedule, count: int, previous: int | None) -> list[int]:
+    """Shapes in list order, like the config defines them."""
+    n = len(schedule.shapes)
+    start = 0 if previous is None else previous + 1
+    return [(start + i) % n for i in range(count)]
+
+
+def shuffled(schedule: TargetSchedule, count: int, previous: int | None) -> list[int]:
+    """Random permutations of all shapes, one after another. The same target never comes twice in a row."""
+    n = len(schedule.shapes)
+    result = []
+    while len(result) < count:
+        block = list(range(n))
+        schedule.rng.shuffle(block)
+        if n > 1 and block[0] == previous:
+            block[0], block[-1] = block[-1], block[0]
+        result.extend(block)
+        previous = block[-1]
+    return result[:count]
+
+
+def fitts_balanced(schedule: TargetSchedule, count: int, previous: int | None) -> list[int]:
+    """
+    Every shape once per block, ordered so that the mean index of difficulty of
+    the movements stays close to the mean of the whole layout: after a hard
+    movement (far away, small target) an easy one follows and vice versa.
+    So a session ending early is not easier or harder than a full one, and
+    participants with different seeds get different but equally hard sequences.
+    Each step compares FITTS_CANDIDATES random shapes, so a block is O(n).
+    The last block is cut off once count targets are scheduled.
+    """
+    n = len(schedule.shapes)
+    if n == 1:
+        return [0] * count
+    rng = schedule.rng
+    pairs = [rng.sample(range(n), 2) for _ in range(FITTS_SAMPLE_PAIRS)]
+    mean = statistics.fmean(schedule.index_of_difficulty(a, b) for a, b in pairs)
+
+    result = []
+    total, moves = 0.0, 0 # sum and number of the movements so far
+    while len(result) < count:
+        remaining = list(range(n))
+        while remaining and len(result) < count: # a large layout is not ordered further than needed
+            if previous is None:
+                pick = rng.randrange(len(remaining))
+            else:
+                best = None
+                for _ in range(min(FITTS_CANDIDATES, len(remaining))):
+                    i = rng.randrange(len(remaining))
+                    if remaining[i] == previous:
+                        continue
+                    difficulty = schedule.index_of_difficulty(previous, remaining[i])
+                    error = abs(total + difficulty - mean * (moves + 1))
+                    if best is None or error < best[0]:
+                        best = (error, i, difficulty)
+                if best is None: # only the previous shape was drawn
+                    pick = next(i for i, s in enumerate(remaining) if s != previous)
+                    difficulty = schedule.index_of_difficulty(previous, remaining[pick])
+                else:
+                    _, pick, difficulty = best
+                total += difficulty
+                moves += 1
+            # swap remove, O(1)
+            remaining[pick], remaining[-1] = remaining[-1], remaining[pick]
+            previous = remaining.pop()
+            result.append(previous)
+    return result[:count]
+
+
+strategies: dict[str, Callable[[TargetSchedule, int, int | None], list[int]]] = {
+    ROUND_ROBIN: round_robin,
+    RANDOM: shuffled,
+    FITTS: fitts_balanced,
+}
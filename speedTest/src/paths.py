@@ -4,3 +4,5 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 CONFIG_DIR = PROJECT_ROOT / "config"
 LOG_DIR = PROJECT_ROOT / "logs"
+CACHE_DIR = PROJECT_ROOT / ".cache"
+HAND_TRACKING_PROFILE = PROJECT_ROOT / "hand_tracking.json" # optional, see CaptureProfile
@@ -2,90 +2,145 @@ from model.shapes import *
 import tkinter as tk
 import logging as log
 
+
 class DrawVisitor:
     """
     Visitor used by the view to paint the shapes on a Tkinter canvas.
+    Canvas items are kept between updates (shape id -> item). An item is only
+    changed if the geometry, color or highlight of its shape changed, so an
+    update without visible changes does not call Tk at all.
+    Call begin() before visiting all shapes and end() afterwards.
     """
     def __init__(self, canvas: tk.Canvas, active: Shape = None):
         self.canvas = canvas
         self.active = active  # Shape, das gerade hervorgehoben ist
 
+        self.items: dict[str, list] = {} # shape id -> [item, kind, coords, fill, width]
+        self._colors: dict[str, str] = {} # color -> validated color
+        self._order: list[str] = [] # shape ids in drawing order
+        self._new_order: list[str] = []
+        self._created: list[str] = []
+
+    def is_legal_color(self, color: str) -> bool:
+        """Checks if Tk knows a color. Results are cached."""
+        checked = self._colors.get(color)
+        if checked is None:
+            # Trying to convertg color (just a string in shape) to rgb, to see if its legal.
+            try:
+                self.canvas.winfo_rgb(color) # return not needed, just check if it raises an error
+                checked = color
+            except tk.TclError:
+                checked = "black"
+            self._colors[color] = checked
+        return checked == color
+
     def _fill_color(self, shape: Shape):
         color = shape.color_active if shape is self.active else shape.color
-
-        # Trying to convertg color (just a string in shape) to rgb, to see if its legal.
-        # If not, use black.
-        try:
-            self.canvas.winfo_rgb(color) # return not needed, just check if it raises an error
-            return color
-        except tk.TclError:
+        if not self.is_legal_color(color):
+            # colors from configs are checked when loading, this is for colors set in the editor
             log.warning(f"color not legal: {color}. Using black.")
             return "black"
+        return color
+
+    def begin(self):
+        self._new_order = []
+        self._created = []
+
+    def end(self):
+        """Deletes items of shapes that were not visited and fixes the stacking order."""
+        visited = set(self._new_order)
+        for shape_id in [i for i in self.items if i not in visited]:
+            self.canvas.delete(self.items.pop(shape_id)[0])
+
+        # New items are created on top. Only restack if that is not the wanted order.
+        created = set(self._created)
+        expected = [i for i in self._order if i in visited and i not in created] + self._created
+        if expected != self._new_order:
+            for shape_id in self._new_order:
+                self.canvas.tag_raise(self.items[shape_id][0])
+        self._order = self._new_order
+
+    def redraw(self, shapes: list[Shape]) -> bool:
+        """
+        Updates the items of some shapes without visiting the others, e.g. after
+        the target changed. Returns False if a shape has no item yet, then the
+        whole scene has to be drawn with begin() / end().
+        """
+        if any(shape.id not in self.items for shape in shapes):
+            return False
+        order, self._new_order = self._new_order, []
+        for shape in shapes:
+            shape.accept(self)
+        self._new_order = order
+        return True
+
+    def move(self, shape: Shape, dx: int, dy: int):
+        """Moves the item of a shape directly, e.g. while dragging."""
+        entry = self.items.get(shape.id)
+        if entry is None:
+            return
+        self.canvas.move(entry[0], dx, dy)
+        entry[2] = tuple(c + (dx if i % 2 == 0 else dy) for i, c in enumerate(entry[2]))
+
+    def _draw(self, shape: Shape, kind: str, coords: tuple):
+        fill = self._fill_color(shape)
+        width = 3 if shape is self.active else 1
+        self._new_order.append(shape.id)
+
+        entry = self.items.get(shape.id)
+        if entry is not None and entry[1] != kind:
+            self.canvas.delete(entry[0])
+            entry = None
+
+        if entry is None:
+            create = getattr(self.canvas, f"create_{kind}")
+            item = create(*coords, fill=fill, outline='black', width=width, tags='shape')
+            self.items[shape.id] = [item, kind, coords, fill, width]
+            self._created.append(shape.id)
+            return
+
+        item = entry[0]
+        if entry[2] != coords:
+            self.canvas.coords(item, *coords)
+            entry[2] = coords
+        if entry[3] != fill or entry[4] != width:
+            self.canvas.itemconfigure(item, fill=fill, width=width)
+            entry[3] = fill
+            entry[4] = width
+
 
-    
     # ============== Square ============== #
     def visit_square(self, square: Square):
         x = square.x
         y = square.y
-        self.canvas.create_rectangle(
-            x, y, x + square.size, y + square.size,
-            fill=self._fill_color(square),
-            outline='black',
-            width=3 if square is self.active else 1,
-            tags='shape'
-        )
+        self._draw(square, 'rectangle', (x, y, x + square.size, y + square.size))
 
     # ============== Circle ============== #
     def visit_circle(self, circle: Circle):
         x = circle.x
         y = circle.y
         r = circle.radius
-        self.canvas.create_oval(
-            x, y, x + 2*r, y + 2*r,
-            fill=self._fill_color(circle),
-            outline='black',
-            width=3 if circle is self.active else 1,
-            tags='shape'
-        )
+        self._draw(circle, 'oval', (x, y, x + 2*r, y + 2*r))
 
     # ============== Rectangle ============== #
     def visit_rectangle(self, rect: Rectangle):
         x = rect.x
         y = rect.y
-        self.canvas.create_rectangle(
-            x, y, x + rect.width, y + rect.height,
-            fill=self._fill_color(rect),
-            outline='black',
-            width=3 if rect is self.active else 1,
-            tags='shape'
-        )
+        self._draw(rect, 'rectangle', (x, y, x + rect.width, y + rect.height))
 
     # ============== Triangle ============== #
     def visit_triangle(self, triangle: Triangle):
         x = triangle.x
         y = triangle.y
-        points = [
-            x, y + triangle.size, 
+        points = (
+            x, y + triangle.size,
             x + triangle.size, y + triangle.size,
             x + triangle.size / 2, y
-        ]
-        self.canvas.create_polygon(
-            points,
-            fill=self._fill_color(triangle),
-            outline='black',
-            width=3 if triangle is self.active else 1,
-            tags='shape'
         )
+        self._draw(triangle, 'polygon', points)
 
     # ============== Ellipse ============== #
     def visit_ellipse(self, ellipse: Ellipse):
         x = ellipse.x
         y = ellipse.y
-        self.canvas.create_oval(
-            x, y,
-            x + 2*ellipse.rx, y + 2*ellipse.ry,
-            fill=self._fill_color(ellipse),
-            outline='black',
-            width=3 if ellipse is self.active else 1,
-            tags='shape'
-        )
+        self._draw(ellipse, 'oval', (x, y, x + 2*ellipse.rx, y + 2*ellipse.ry))
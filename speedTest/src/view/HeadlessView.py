@@ -0,0 +1,46 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from view.ViewInterface import ViewInterface
+
+if TYPE_CHECKING:
+    from model.Model import Model
+    from model.ChangeSet import ChangeSet
+
+
+class HeadlessView(ViewInterface):
+    """
+    View without a display, used to run tests in batch jobs.
+    Has a virtual canvas of the given size with the start button in its center,
+    and only counts what the Tk view would draw.
+    """
+    def __init__(self, model: Model, width: int = 1000, height: int = 770):
+        self.model = model
+        self.model.set_observer(self)
+        self.width = width
+        self.height = height
+
+        w, h = 200, 80 # same as the Tk start button
+        cx, cy = width // 2, height // 2
+        self.start_button_coords = (cx - w//2, cy - h//2, cx + w//2, cy + h//2)
+
+        self.updates = 0
+        self.timer_updates = 0
+        self.timer_seconds = None
+        self.mode = None
+
+    def update(self, changes: ChangeSet=None):
+        self.updates += 1
+
+    def update_timer(self, seconds: int=None):
+        self.timer_updates += 1
+        self.timer_seconds = self.model.timer_duration if seconds is None else seconds
+
+    def show_idle_ui(self):
+        self.mode = "idle"
+
+    def show_running_ui(self):
+        self.mode = "running"
+
+    def show_edit_ui(self):
+        self.mode = "edit"
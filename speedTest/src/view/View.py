@@ -7,9 +7,13 @@ from tkinter import messagebox
 import logging as log
 import os
 from pathlib import Path
-from inputs import devices
 
 from paths import CONFIG_DIR, LOG_DIR
+from controller.input_devices.DeviceRegistry import registry
+from controller.input_devices.DeviceDiscovery import DeviceDiscovery
+from model.ChangeSet import HISTORY_CHANGED
+from model.TargetSchedule import ROUND_ROBIN, RANDOM, FITTS
+from view.ViewInterface import ViewInterface
 from view.DrawVisitor import DrawVisitor
 from view.CanvasCursor import CanvasCursor
 from view.EditVisitor import EditVisitor
@@ -21,10 +25,11 @@ from view.popups.TimerDialog import TimerDialog
 if TYPE_CHECKING:
     from model.Model import Model
     from model.shapes import Shape
+    from model.ChangeSet import ChangeSet
     from controller.Controller import Controller
     
 
-class View:
+class View(ViewInterface):
     def __init__(self, root: tk.Tk, model: Model, controller: Controller):
         self.root = root
         self.model = model
@@ -44,8 +49,37 @@ class View:
         export_menu = tk.Menu(self.file_menu, tearoff=0)
         export_menu.add_command(label="JSON", command=self.choose_export_log_json)
         export_menu.add_command(label="CSV", command=self.choose_export_log_csv)
+        export_menu.add_command(label="Parquet", command=self.choose_export_log_parquet)
+        export_menu.add_command(label="Arrow IPC", command=self.choose_export_log_arrow)
+        export_menu.add_command(label="NDJSON", command=self.choose_export_log_ndjson)
+
+        # Compression used for Parquet and NDJSON. Arrow is written uncompressed, so it can be memory-mapped
+        export_menu.add_separator()
+        self.compression_var = tk.StringVar(value="zstd")
+        for compression in ("zstd", "gzip", "none"):
+            export_menu.add_radiobutton(
+                label=f"Compression: {compression}",
+                variable=self.compression_var,
+                value=compression
+            )
 
         self.file_menu.add_cascade(label="Export Clicks", menu=export_menu)
+
+        # Streaming clicks to LOG_DIR/stream while a test is running
+        self.stream_var = tk.BooleanVar(value=model.log_writer is not None)
+        self.file_menu.add_checkbutton(
+            label="Stream Clicks to Disk",
+            variable=self.stream_var,
+            command=lambda: controller.state.set_log_streaming(self.stream_var.get())
+        )
+
+        # Input-to-pixel latency per device, exported with the click log
+        self.latency_var = tk.BooleanVar(value=model.latency_tracer is not None)
+        self.file_menu.add_checkbutton(
+            label="Trace Input Latency",
+            variable=self.latency_var,
+            command=lambda: controller.state.set_latency_tracing(self.latency_var.get())
+        )
         self.file_menu.add_separator()
         self.file_menu.add_command(label="Quit", command=self.quit_program)
 
@@ -55,6 +89,19 @@ class View:
         self.config_menu.add_separator()
         self.config_menu.add_command(label="Load Config", command=self.choose_config)
         self.config_menu.add_command(label="Export Config", command=self.choose_export_config)
+        self.config_menu.add_separator()
+
+        # Order of the targets in a test, stored with the click log
+        order_menu = tk.Menu(self.config_menu, tearoff=0)
+        self.target_order_var = tk.StringVar(value=model.target_order)
+        for label, order in (("Round Robin", ROUND_ROBIN), ("Random", RANDOM), ("Fitts Balanced", FITTS)):
+            order_menu.add_radiobutton(
+                label=label,
+                variable=self.target_order_var,
+                value=order,
+                command=lambda: controller.state.set_target_order(self.target_order_var.get())
+            )
+        self.config_menu.add_cascade(label="Target Order", menu=order_menu)
         
         
 
@@ -65,10 +112,12 @@ class View:
         # ================== Toolbar ==================
         toolbar = ttk.Frame(root)
 
-        # Dropdow for input devices
-        inputs = ["Mouse", "Hand Tracking"]
-        if devices.gamepads:
-            inputs.append("Gamepad")
+        # Dropdow for input devices, backends are only loaded when selected.
+        # Connected devices are added by the discovery thread, see _poll_devices()
+        inputs = registry.always_available()
+        self.available_devices: list[str] = None # None until the first discovery
+        self.device_discovery = DeviceDiscovery(registry)
+        self.device_discovery.start()
             
         ttk.Label(toolbar, text="Input Device:").pack(side=tk.LEFT, padx=5)
         self.input_cb_var = tk.StringVar(value="Mouse")  # Default = "Mouse"
@@ -77,7 +126,8 @@ class View:
             textvariable=self.input_cb_var,
             values=inputs,
             state="readonly",
-            width=15
+            width=15,
+            postcommand=self.device_discovery.refresh # a gamepad plugged in just now is found when opening
         )
         self.input_dropdown.pack(side="left", padx=5, pady=4)
         self.input_dropdown.bind(
@@ -87,7 +137,8 @@ class View:
 
         # Dropdown with configs
         ttk.Label(toolbar, text="Configs:").pack(side=tk.LEFT, padx=5)
-        self.config_files = [f.stem for f in CONFIG_DIR.glob("*.json")]
+        self.config_library = model.config_library # names are paths relative to CONFIG_DIR
+        self.config_files = self.config_library.names()
         self.config_var = tk.StringVar()
         self.config_combobox = ttk.Combobox(
             toolbar,
@@ -98,6 +149,9 @@ class View:
         )
         self.config_combobox.pack(side=tk.LEFT, padx=5)
         self.config_combobox.bind("<<ComboboxSelected>>", self.on_config_selected)
+
+        # Progress of loading a config, only visible while loading
+        self.load_progress = ttk.Progressbar(toolbar, length=100, maximum=1.0, mode="determinate")
         if self.config_files:
             self.config_var.set(self.config_files[0])
 
@@ -164,8 +218,13 @@ class View:
         self.canvas.bind("<Configure>", self._on_canvas_resize)
 
         self.draw_visitor = DrawVisitor(self.canvas)
+        self.model.color_validator = self.draw_visitor.is_legal_color
         self.cursor = CanvasCursor(self.canvas)
 
+        self._poll_devices()
+        self.config_library.start()
+        self._poll_config_library()
+
         # Display inital state
         self.update()
         self.update_timer()
@@ -186,17 +245,16 @@ class View:
             return
 
         # Datei-Pfad zusammensetzen
-        filepath = CONFIG_DIR / f"{selected_name}.json"
+        filepath = self.config_library.path_of(selected_name)
 
         # Config laden
         self.controller.state.load_config(filepath)
 
 
     def refresh_config_list(self):
-        """Loads every confing inside /config into the dropdown."""
+        """Shows every config of the library (/config and subfolders) in the dropdown."""
         current = self.config_var.get()
-        configs = [f.stem for f in CONFIG_DIR.glob("*.json")]
-        configs.sort()  # optional: alphabetisch sortieren
+        configs = self.config_library.names() # sorted by name
 
         self.config_combobox["values"] = configs
 
@@ -209,6 +267,16 @@ class View:
             self.config_var.set("")
 
 
+    def _poll_config_library(self):
+        """Takes changes found by the library thread into the dropdown."""
+        if self.config_library.poll():
+            first = not self.config_var.get()
+            self.refresh_config_list()
+            if first and self.config_var.get():
+                self.on_config_selected() # no config was known at startup
+        self.root.after(500, self._poll_config_library)
+
+
     def _create_canvas_start_button(self):
         """Create start button once"""
         w, h = 200, 80
@@ -246,16 +314,33 @@ class View:
         self.cursor.raise_cursor()
 
 
-    def update(self):
-        self.canvas.delete('shape')  # Delete existing shapes, but not cursor or start button
+    def update(self, changes: ChangeSet=None):
+        """
+        Brings the canvas items in line with the shapes. Unchanged shapes cost no Tk call.
+        If only some shapes changed (e.g. the target), only those are visited.
+        """
         self.draw_visitor.active = self.model.shape_active
+        if changes is not None and not changes.needs_full_redraw():
+            shapes = [s for s in map(self.model.get_shape, changes.changed_shape_ids()) if s is not None]
+            if self.draw_visitor.redraw(shapes):
+                if HISTORY_CHANGED in changes:
+                    self._set_undo_redo_state()
+                return
+
+        self.draw_visitor.begin()
         for shape in self.model.shapes:
             shape.accept(self.draw_visitor)
+        self.draw_visitor.end()
         self.cursor.raise_cursor()
         self._raise_start_button()
         self._set_undo_redo_state()
 
 
+    def move_shape(self, shape: Shape, dx: int, dy: int):
+        """Moves the canvas item of a shape without redrawing the scene. Used while dragging."""
+        self.draw_visitor.move(shape, dx, dy)
+
+
     def update_timer(self, seconds: int=None):
         if seconds is None:
             seconds = self.model.timer_duration # Get from config if not specified
@@ -265,12 +350,12 @@ class View:
 
     def _set_undo_redo_state(self):
         if self.controller.state == self.controller.edit_state:
-            if len(self.model.undo_stack) > 1:
+            if self.model.can_undo():
                 self.undo_btn.config(state="enabled")
             else:
                 self.undo_btn.config(state="disabled")
 
-            if self.model.redo_stack:
+            if self.model.can_redo():
                 self.redo_btn.config(state="enabled")
             else:
                 self.redo_btn.config(state="disabled")
@@ -280,7 +365,64 @@ class View:
         self.root.destroy()
 
 
+    def _poll_devices(self):
+        """Takes the result of the discovery thread into the dropdown (Tk only from the main thread)."""
+        available = self.device_discovery.poll()
+        if available is not None:
+            self.input_dropdown["values"] = available
+            self.available_devices = available
+            self._check_input_device()
+        self.root.after(250, self._poll_devices)
+
+
+    def _check_input_device(self):
+        """If the selected device was unplugged, the state falls back to the mouse (in a test once it is over)."""
+        if self.available_devices is not None and self.input_cb_var.get() not in self.available_devices:
+            self.controller.state.device_disconnected(self.input_cb_var.get())
+
+
+    def show_load_progress(self, fraction: float=None):
+        if fraction is None:
+            self.load_progress.pack_forget()
+            return
+        if not self.load_progress.winfo_ismapped():
+            self.load_progress.pack(side=tk.LEFT, padx=5, after=self.config_combobox)
+        self.load_progress["value"] = fraction
+
+
+    def show_input_device(self, name: str):
+        self.input_cb_var.set(name)
+
+
     # ================== State dependant UI toggles ==================
+    def show_idle_ui(self):
+        self.input_dropdown.configure(state="normal")
+        self._check_input_device() # unplugged during a test or in the editor
+
+        # Button
+        self.stop_btn.configure(state="disabled")
+        self.show_start_button()
+        self.hide_stop_button()
+        self.hide_edit_ui()
+
+        # Menu
+        self.config_menu.entryconfig("Edit Config", state="normal")
+        self.config_menu.entryconfig("Load Config", state="normal")
+        self.config_menu.entryconfig("Target Order", state="normal")
+        self.file_menu.entryconfig("Stream Clicks to Disk", state="normal")
+        self.file_menu.entryconfig("Trace Input Latency", state="normal")
+
+    def show_running_ui(self):
+        self.input_dropdown.configure(state="disabled")
+        self.hide_start_button()
+        self.show_stop_button()
+
+        self.config_menu.entryconfig("Edit Config", state="disabled")
+        self.config_menu.entryconfig("Load Config", state="disabled")
+        self.config_menu.entryconfig("Target Order", state="disabled")
+        self.file_menu.entryconfig("Stream Clicks to Disk", state="disabled")
+        self.file_menu.entryconfig("Trace Input Latency", state="disabled")
+
     def show_start_button(self):
         """Make the start button visible (Button on Canvas)."""
         if self.start_button_item:
@@ -305,6 +447,18 @@ class View:
         self.stop_btn.configure(state="disabled")
 
     def show_edit_ui(self):
+        # Mouse input is forced in the editor
+        self.input_dropdown.current(0)
+        self.input_dropdown.configure(state="disabled")
+        self.hide_start_button()
+
+        # Menu
+        self.config_menu.entryconfig("Edit Config", state="disabled")
+        self.config_menu.entryconfig("Load Config", state="normal")
+        self.config_menu.entryconfig("Target Order", state="normal")
+
+        # Buttons
+        self.stop_btn.config(state="disabled")
         self.exit_edit_btn.pack(side=tk.LEFT, padx=2, pady=2)
         self.exit_edit_btn.configure(state="enabled")
         self.save_as_btn.pack(side=tk.LEFT, padx=2, pady=2)
@@ -358,7 +512,8 @@ class View:
             shape_classes,
             x=x,
             y=y,
-            callback=lambda values: self.controller.state.add_shape_from_dialog(values)
+            callback=lambda values: self.controller.state.add_shape_from_dialog(values),
+            suggest_id=lambda shape_type: self.model.next_free_id(shape_type[0])
         )
 
     def show_id_error(self, shape_id):
@@ -390,8 +545,10 @@ class View:
         if filepath:
             path = Path(filepath)
             self.controller.state.export_config(path)
+            name = self.config_library.update_file(path)
             self.refresh_config_list() # to update config drop-down
-            self.config_var.set(path.stem)
+            if name is not None:
+                self.config_var.set(name)
 
 
     def choose_export_log_json(self):
@@ -419,3 +576,47 @@ class View:
             self.controller.state.export_log(Path(filepath), "csv")
 
 
+    def _export_compression(self):
+        compression = self.compression_var.get()
+        return None if compression == "none" else compression
+
+
+    def choose_export_log_parquet(self):
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        filepath = fd.asksaveasfilename(
+            title="Save Click Log as Parquet",
+            defaultextension=".parquet",
+            initialdir=LOG_DIR,
+            filetypes=[("Parquet files", "*.parquet")]
+        )
+
+        if filepath:
+            self.controller.state.export_log(Path(filepath), "parquet", self._export_compression())
+
+
+    def choose_export_log_arrow(self):
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        filepath = fd.asksaveasfilename(
+            title="Save Click Log as Arrow IPC",
+            defaultextension=".arrow",
+            initialdir=LOG_DIR,
+            filetypes=[("Arrow IPC files", "*.arrow")]
+        )
+
+        if filepath:
+            self.controller.state.export_log(Path(filepath), "arrow")
+
+
+    def choose_export_log_ndjson(self):
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        compression = self._export_compression()
+        extension = {"gzip": ".ndjson.gz", "zstd": ".ndjson.zst"}.get(compression, ".ndjson")
+        filepath = fd.asksaveasfilename(
+            title="Save Click Log as NDJSON",
+            defaultextension=extension,
+            initialdir=LOG_DIR,
+            filetypes=[("NDJSON files", f"*{extension}")]
+        )
+
+        if filepath:
+            self.controller.state.export_log(Path(filepath), "ndjson", compression)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from model.shapes import Shape
+    from model.ChangeSet import ChangeSet
+
+
+class ViewInterface:
+    """
+    Everything the controller states need from a view.
+    Implemented by the Tk View and by HeadlessView, which runs tests without a display.
+    """
+    start_button_coords: tuple = None # (x1, y1, x2, y2) of the canvas start button
+
+    def update(self, changes: ChangeSet=None):
+        """Called by the model at most once per idle cycle with what changed, None means everything."""
+        raise NotImplementedError
+
+    def update_timer(self, seconds: int=None):
+        raise NotImplementedError
+
+    def show_load_progress(self, fraction: float=None):
+        """Progress of a config load (0..1), None hides it."""
+        pass
+
+    # ================== State dependant UI ==================
+    def show_idle_ui(self):
+        raise NotImplementedError
+
+    def show_running_ui(self):
+        raise NotImplementedError
+
+    def show_edit_ui(self):
+        raise NotImplementedError
+
+    def show_input_device(self, name: str):
+        """Shows which input device is used, e.g. after falling back to the mouse."""
+        pass
+
+    # ================== Editor ==================
+    def move_shape(self, shape: Shape, dx: int, dy: int):
+        pass
+
+    def edit_shape_dialog(self, x: int, y: int, shape: Shape):
+        pass
+
+    def new_shape_dialog(self, x: int=0, y: int=0):
+        pass
+
+    def show_id_error(self, shape_id):
+        pass
@@ -2,10 +2,12 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 
 class NewShapeDialog(tk.Toplevel):
-    def __init__(self, parent: tk.Tk, shape_classes: dict, x: int=0, y: int=0, callback=None):
+    def __init__(self, parent: tk.Tk, shape_classes: dict, x: int=0, y: int=0, callback=None, suggest_id=None):
         super().__init__(parent)
         self.title("New Shape")
         self.callback = callback
+        self.suggest_id = suggest_id # shape type -> free id, e.g. "square" -> "s3"
+        self._suggested = ""
         self.result = None
         self.x = x
         self.y = y
@@ -34,6 +36,8 @@ class NewShapeDialog(tk.Toplevel):
         self.var_id = tk.StringVar()
         self.entry_id = tk.Entry(self, textvariable=self.var_id)
         self.entry_id.pack(padx=5, pady=2)
+        self.dropdown.bind("<<ComboboxSelected>>", lambda event: self._suggest())
+        self._suggest()
 
         # Buttons
         btn_frame = tk.Frame(self)
@@ -48,6 +52,14 @@ class NewShapeDialog(tk.Toplevel):
 
 
 
+    def _suggest(self):
+        """Fills in a free id for the selected type, unless the user typed one."""
+        if self.suggest_id is None or self.var_id.get() != self._suggested:
+            return
+        self._suggested = self.suggest_id(self.var_type.get())
+        self.var_id.set(self._suggested)
+        self.entry_id.select_range(0, "end")
+
     def ok(self):
         shape_id = self.var_id.get().strip()
         if not shape_id: